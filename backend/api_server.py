@@ -0,0 +1,387 @@
+import asyncio
+import hashlib
+import json
+import math
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from backend.movie_service import MovieExistsError, MovieNotFoundError
+
+
+class ApiError(Exception):
+    """An error answered with an HTTP status and a JSON message."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    """
+    Serve the movie database as a JSON HTTP API.
+
+    The server runs on asyncio streams with HTTP/1.1 keep-alive, in a single
+    thread, so requests are handled one at a time against the in-memory
+    catalog of the storage; only OMDB lookups for new movies are moved to a
+    worker thread. Read responses are cached per catalog version and carry
+    an ETag, so a client asking again for an unchanged listing gets a 304
+    without the listing being built.
+
+    Endpoints:
+        GET    /movies?offset=0&limit=50   A page of movies.
+        POST   /movies                     Add {"title", ["year", "rating", "poster"]}.
+        GET    /movies/<title>             One movie.
+        PUT    /movies/<title>             Change the rating, {"rating": 8.1}.
+        DELETE /movies/<title>             Delete a movie.
+        GET    /search?q=<title>&limit=3   Find a movie or similar titles.
+        GET    /stats                      The rating statistics.
+    """
+
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 1000
+    MAX_BODY_BYTES = 64 * 1024
+    # Responses kept per catalog version, e.g. distinct pages and searches
+    MAX_CACHED_RESPONSES = 1024
+
+    def __init__(self, service, host: str = "127.0.0.1", port: int = 8000) -> None:
+        """
+        Initialize the server.
+
+        Args:
+            service (MovieService): The operations of the database.
+            host (str): The address to listen on.
+            port (int): The port to listen on.
+        """
+        self.service = service
+        self.host = host
+        self.port = port
+        self._responses = {}  # Request target -> (ETag, body) for the version
+        self._responses_version = None
+
+    def serve(self) -> None:
+        """
+        Serve requests until interrupted.
+        """
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def _serve(self) -> None:
+        """
+        Listen and serve requests forever.
+        """
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        print(f"Serving the movie API on http://{self.host}:{self.port}/")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer) -> None:
+        """
+        Answer the requests of one connection until the client closes it.
+
+        Args:
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            writer (asyncio.StreamWriter): The outgoing side of the connection.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break  # The client closed the connection
+                except asyncio.LimitOverrunError:
+                    writer.write(self._response(HTTPStatus.BAD_REQUEST, b"", False))
+                    break
+
+                method, target, version, headers = ApiServer._parse_head(head)
+                length = ApiServer._content_length(headers)
+                keep_alive = version == "HTTP/1.1" and (
+                    headers.get("connection", "").lower() != "close"
+                )
+                if length is None:
+                    # The body cannot be found, so neither can the next request
+                    status, extra, body = self._error(
+                        HTTPStatus.BAD_REQUEST, "Invalid Content-Length."
+                    )
+                    keep_alive = False
+                elif length > ApiServer.MAX_BODY_BYTES:
+                    status, extra, body = self._error(
+                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large."
+                    )
+                    keep_alive = False
+                else:
+                    request_body = await reader.readexactly(length) if length else b""
+                    status, extra, body = await self._dispatch(
+                        method, target, headers, request_body
+                    )
+                writer.write(self._response(status, body, keep_alive, extra))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass  # Broken connection or a malformed request line
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes) -> tuple:
+        """
+        Split the request line and headers of a request.
+
+        Args:
+            head (bytes): Everything up to and including the empty line.
+
+        Returns:
+            tuple: The method, target, HTTP version and lower-cased headers.
+        """
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return method, target, version, headers
+
+    @staticmethod
+    def _content_length(headers: dict):
+        """
+        Read the Content-Length header of a request.
+
+        Args:
+            headers (dict): The lower-cased request headers.
+
+        Returns:
+            int | None: The length of the body, 0 without the header, or None
+                if it is not a whole number.
+        """
+        length = headers.get("content-length") or "0"
+        if not (length.isascii() and length.isdigit()):
+            return None
+        return int(length)
+
+    @staticmethod
+    def _response(
+        status: HTTPStatus, body: bytes, keep_alive: bool, extra: dict = None
+    ) -> bytes:
+        """
+        Build a complete HTTP response.
+
+        Args:
+            status (HTTPStatus): The status.
+            body (bytes): The JSON body, empty for a 304.
+            keep_alive (bool): Keep the connection open for more requests.
+            extra (dict): More headers, e.g. the ETag.
+
+        Returns:
+            bytes: The response.
+        """
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if body:
+            lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        for name, value in (extra or {}).items():
+            lines.append(f"{name}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    @staticmethod
+    def _error(status: HTTPStatus, message: str) -> tuple:
+        """
+        Build the status, headers and body of an error response.
+
+        Args:
+            status (HTTPStatus): The status.
+            message (str): What went wrong.
+
+        Returns:
+            tuple: The status, extra headers and JSON body.
+        """
+        return status, {}, json.dumps({"error": message}).encode()
+
+    async def _dispatch(self, method: str, target: str, headers: dict, body: bytes):
+        """
+        Route a request to its handler.
+
+        Args:
+            method (str): The HTTP method.
+            target (str): The path and query string.
+            headers (dict): The lower-cased request headers.
+            body (bytes): The request body.
+
+        Returns:
+            tuple: The status, extra headers and JSON body of the response.
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        try:
+            if method == "GET" and parts[0] in ("movies", "search", "stats"):
+                return self._cached_get(target, headers, parts, query)
+            if parts == ["movies"] and method == "POST":
+                movie = await self._add_movie(ApiServer._json_body(body))
+                return HTTPStatus.CREATED, {}, json.dumps(movie).encode()
+            if len(parts) == 2 and parts[0] == "movies" and method == "PUT":
+                rating = ApiServer._json_body(body).get("rating")
+                # json.loads() reads NaN and Infinity, and bools are ints
+                if (
+                    isinstance(rating, bool)
+                    or not isinstance(rating, (int, float))
+                    or not math.isfinite(rating)
+                    or not 0 <= rating <= 10
+                ):
+                    raise ApiError(
+                        HTTPStatus.BAD_REQUEST, "A rating from 0 to 10 is needed."
+                    )
+                movie = self.service.update_movie(parts[1], rating)
+                return HTTPStatus.OK, {}, json.dumps(movie).encode()
+            if len(parts) == 2 and parts[0] == "movies" and method == "DELETE":
+                movie = self.service.delete_movie(parts[1])
+                return HTTPStatus.OK, {}, json.dumps(movie).encode()
+            raise ApiError(
+                HTTPStatus.NOT_FOUND, f"No endpoint for {method} {url.path}."
+            )
+        except ApiError as e:
+            return ApiServer._error(e.status, str(e))
+        except MovieNotFoundError as e:
+            return ApiServer._error(HTTPStatus.NOT_FOUND, str(e))
+        except MovieExistsError as e:
+            return ApiServer._error(HTTPStatus.CONFLICT, str(e))
+        except ValueError as e:
+            # An invalid year or rating
+            return ApiServer._error(HTTPStatus.BAD_REQUEST, str(e))
+        except Exception as e:
+            return ApiServer._error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Error: {e}")
+
+    def _cached_get(self, target: str, headers: dict, parts: list, query: dict):
+        """
+        Answer a GET from the response cache of the current catalog version.
+
+        Args:
+            target (str): The path and query string, the cache key.
+            headers (dict): The lower-cased request headers.
+            parts (list): The decoded path segments.
+            query (dict): The parsed query string.
+
+        Returns:
+            tuple: The status, extra headers and JSON body of the response.
+        """
+        version = self.service.storage.catalog_version()
+        if version is None or version != self._responses_version:
+            self._responses = {}
+            self._responses_version = version
+
+        cached = self._responses.get(target)
+        if cached is None:
+            body = json.dumps(self._get(parts, query)).encode()
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            cached = (etag, body)
+            if version is not None:
+                if len(self._responses) >= ApiServer.MAX_CACHED_RESPONSES:
+                    self._responses.clear()
+                self._responses[target] = cached
+
+        etag, body = cached
+        if headers.get("if-none-match") == etag:
+            return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, b""
+        return HTTPStatus.OK, {"ETag": etag}, body
+
+    def _get(self, parts: list, query: dict):
+        """
+        Run a read-only request.
+
+        Args:
+            parts (list): The decoded path segments.
+            query (dict): The parsed query string.
+
+        Returns:
+            object: The result, ready to be serialized as JSON.
+        """
+        if parts == ["movies"]:
+            offset = ApiServer._int_param(query, "offset", 0)
+            limit = min(
+                ApiServer._int_param(query, "limit", ApiServer.DEFAULT_PAGE_SIZE),
+                ApiServer.MAX_PAGE_SIZE,
+            )
+            return {
+                "count": self.service.count(),
+                "offset": offset,
+                "limit": limit,
+                "movies": self.service.list_movies(offset, limit),
+            }
+        if len(parts) == 2 and parts[0] == "movies":
+            return self.service.get_movie(parts[1])
+        if parts == ["search"]:
+            if not query.get("q"):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "A query q is needed.")
+            return self.service.search(
+                query["q"][0], ApiServer._int_param(query, "limit", 3)
+            )
+        if parts == ["stats"]:
+            return self.service.stats()
+        raise ApiError(HTTPStatus.NOT_FOUND, "No such resource.")
+
+    async def _add_movie(self, params: dict) -> dict:
+        """
+        Add a movie, looking its details up on OMDB in a worker thread.
+
+        Args:
+            params (dict): The title and optionally the year, rating and poster.
+
+        Returns:
+            dict: The movie as added.
+        """
+        title = params.get("title")
+        if not isinstance(title, str) or not title.strip():
+            raise ApiError(HTTPStatus.BAD_REQUEST, "A title is needed.")
+        year, rating, poster = (params.get(key) for key in ("year", "rating", "poster"))
+        if year is None and rating is None:
+            # Keep serving other requests while OMDB answers
+            loop = asyncio.get_running_loop()
+            title, year, rating, poster = await loop.run_in_executor(
+                None, self.service.fetch_details, title
+            )
+        return self.service.add_movie(title, year, rating, poster)
+
+    @staticmethod
+    def _json_body(body: bytes) -> dict:
+        """
+        Parse a JSON object request body.
+
+        Args:
+            body (bytes): The request body.
+
+        Returns:
+            dict: The parsed object.
+        """
+        try:
+            params = json.loads(body or b"{}")
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "The body is not valid JSON.")
+        if not isinstance(params, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object.")
+        return params
+
+    @staticmethod
+    def _int_param(query: dict, name: str, default: int) -> int:
+        """
+        Read a non-negative integer query parameter.
+
+        Args:
+            query (dict): The parsed query string.
+            name (str): The parameter.
+            default (int): The value if the parameter is missing.
+
+        Returns:
+            int: The value.
+        """
+        try:
+            value = int(query[name][0]) if name in query else default
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number.")
+        return value
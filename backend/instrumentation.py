@@ -0,0 +1,224 @@
+import cProfile
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """
+    Time the methods of the app, the service, the storage and the helpers.
+
+    Instrumented classes get every method they define or inherit wrapped,
+    so each call is counted and its wall time recorded under
+    "<class>.<method>", private helpers like StorageJson._read_data
+    included. Times are inclusive: StorageJson.add_movie includes the
+    StorageJson._write_data it calls, and the menu actions include the time
+    spent waiting for input. Generators are timed while they are consumed.
+    With a profile directory, the chosen methods, e.g. the menu actions,
+    also run under cProfile, and one .prof file per method is written there
+    for pstats or snakeviz.
+    """
+
+    def __init__(self, profile_dir: str = None) -> None:
+        """
+        Initialize the instrumentation.
+
+        Args:
+            profile_dir (str): The directory for the cProfile stats, or None
+                to only time the calls.
+        """
+        self.profile_dir = profile_dir
+        self._timings = {}  # "<class>.<method>" -> [calls, seconds, max seconds]
+        self._profiles = {}  # "<class>.<method>" -> cProfile.Profile
+        self._profiling = False  # cProfile cannot be nested
+        self._storages = []
+        self._instrumented = set()
+        self._record_lock = threading.Lock()  # OMDB fetches run in threads
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Count a call of an operation and add its time.
+
+        Args:
+            name (str): The operation.
+            seconds (float): The wall time of the call.
+        """
+        with self._record_lock:
+            timing = self._timings.setdefault(name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        Time the code in the with block as one call of an operation.
+
+        Args:
+            name (str): The operation.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def profiled(self, name: str):
+        """
+        Time the with block and, with a profile directory, run it under cProfile.
+
+        Args:
+            name (str): The operation, also the name of its .prof file.
+        """
+        if not self.profile_dir or self._profiling:
+            with self.timed(name):
+                yield
+            return
+
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        self._profiling = True
+        try:
+            with self.timed(name):
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+        finally:
+            self._profiling = False
+
+    def instrument_class(self, cls, profile=()) -> None:
+        """
+        Time every call to the methods of a class, in all its instances.
+
+        Inherited methods are wrapped too and recorded under the name of
+        the class. Static and class methods and properties are left alone.
+
+        Args:
+            cls (type): The class.
+            profile (Iterable[str]): The methods to run under cProfile too.
+        """
+        if cls in self._instrumented:
+            return
+        self._instrumented.add(cls)
+        profile = set(profile)
+        for name in dir(cls):
+            method = inspect.getattr_static(cls, name)
+            if name.startswith("__") or not inspect.isfunction(method):
+                continue
+            setattr(
+                cls, name, self._wrap(f"{cls.__name__}.{name}", method, name in profile)
+            )
+
+    def watch_storage(self, storage) -> None:
+        """
+        Instrument the class of a storage and report its I/O counters.
+
+        Args:
+            storage (IStorage): The storage.
+        """
+        self.instrument_class(type(storage))
+        self._storages.append(storage)
+
+    def _wrap(self, name: str, method, profile: bool):
+        """
+        Wrap a method so its calls are timed.
+
+        Args:
+            name (str): The operation to record the calls as.
+            method (Callable): The function defined on the class.
+            profile (bool): Run the calls under cProfile too.
+
+        Returns:
+            Callable: The wrapper.
+        """
+        if inspect.isgeneratorfunction(method):
+
+            @functools.wraps(method)
+            def generator_wrapper(*args, **kwargs):
+                return self._timed_generator(name, method(*args, **kwargs))
+
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if profile:
+                with self.profiled(name):
+                    return method(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    def _timed_generator(self, name: str, generator):
+        """
+        Yield from a generator, recording the time spent in it as one call.
+
+        Args:
+            name (str): The operation.
+            generator (Generator): The generator.
+
+        Yields:
+            object: The items of the generator.
+        """
+        seconds = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - start
+                yield item
+        finally:
+            self.record(name, seconds)
+
+    def report(self, file=None) -> None:
+        """
+        Print the timings, slowest first, and the I/O of the storages.
+
+        The report goes to stderr by default, so it does not mix with the
+        JSON the commands print. Also writes the cProfile stats.
+
+        Args:
+            file (TextIO): Where to print the report.
+        """
+        file = file or sys.stderr
+        print("\nProfile (wall time, inclusive of nested calls)", file=file)
+        print(
+            f"{'operation':<44}{'calls':>8}{'total ms':>12}{'mean ms':>10}"
+            f"{'max ms':>10}",
+            file=file,
+        )
+        timings = sorted(self._timings.items(), key=lambda item: -item[1][1])
+        for name, (calls, seconds, longest) in timings:
+            mean = seconds / calls
+            print(
+                f"{name:<44}{calls:>8}{seconds * 1000:>12.3f}{mean * 1000:>10.3f}"
+                f"{longest * 1000:>10.3f}",
+                file=file,
+            )
+
+        for storage in self._storages:
+            counters = storage.io_stats()
+            if counters:
+                summary = ", ".join(
+                    f"{key}={value}" for key, value in sorted(counters.items())
+                )
+                print(f"I/O of {type(storage).__name__}: {summary}", file=file)
+
+        if self.profile_dir and self._profiles:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            for name, profile in self._profiles.items():
+                profile.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            print(f"cProfile stats written to {self.profile_dir}", file=file)
@@ -1,20 +1,28 @@
 import os
-import random
 import sys
+from typing import TYPE_CHECKING
 
-import requests
 from colorama import Fore, init
-from dotenv import load_dotenv
-from rapidfuzz import fuzz, process
+
+from backend.movie_service import MovieExistsError, MovieNotFoundError, MovieService
+from backend.site_builder import SiteBuilder
+from storage.factory import SUPPORTED_EXTENSIONS
+
+if TYPE_CHECKING:
+    # Imported when used, so starting the menu loads neither requests nor
+    # rapidfuzz
+    from backend.omdb_client import OmdbClient
+    from backend.poster_mirror import PosterMirror
 
 init(autoreset=True)
-load_dotenv("backend/.env")
 
 
 class MovieApp:
-    INDEX_TEMPLATE_PATH = "templates/index_template.html"
-    MOVIE_TEMPLATE_PATH = "templates/movie_li.html"
-    URI = r"http://www.omdbapi.com/?"
+    INDEX_TEMPLATE_PATH = MovieService.INDEX_TEMPLATE_PATH
+    MOVIE_TEMPLATE_PATH = MovieService.MOVIE_TEMPLATE_PATH
+
+    # Movies fetched at once when listing the whole catalog by rating
+    SORT_PAGE_SIZE = 100
 
     MAIN_MENU_ITEMS = [
         "Exit My Movies Database",
@@ -27,16 +35,50 @@ class MovieApp:
         "Search movie",
         "Movies sorted by rating",
         "Create Website",
+        "Refresh ratings",
+    ]
+    # The method run for each of the MAIN_MENU_ITEMS
+    MENU_ACTIONS = [
+        "_exit_app",
+        "_list_movies",
+        "_add_movie",
+        "_delete_movie",
+        "_update_movie",
+        "_stats",
+        "_random_movie",
+        "_search_movie",
+        "_sort_by_rating",
+        "_create_website",
+        "refresh_ratings",
     ]
 
-    def __init__(self, storage) -> None:
+    def __init__(
+        self,
+        storage,
+        omdb_client: "OmdbClient" = None,
+        refresh_checkpoint: str = os.path.join("data", ".refresh"),
+        site_builder: SiteBuilder = None,
+        poster_mirror: "PosterMirror" = None,
+    ) -> None:
         """
         Initialize the MovieApp with a storage object.
 
         Args:
             storage (object): An object that handles storing and retrieving movie data.
+            omdb_client (OmdbClient): The client used to fetch movie details.
+            refresh_checkpoint (str): The file that tracks an unfinished rating refresh.
+            site_builder (SiteBuilder): The builder used to create the website.
+            poster_mirror (PosterMirror): Mirrors the posters for the website,
+                or None to link to them on OMDB.
         """
         self.storage = storage
+        self.service = MovieService(
+            storage,
+            omdb_client=omdb_client,
+            refresh_checkpoint=refresh_checkpoint,
+            site_builder=site_builder,
+            poster_mirror=poster_mirror,
+        )
 
     def _get_movie_poster_manually(self) -> str:
         """
@@ -57,25 +99,17 @@ class MovieApp:
         Returns:
             tuple: A tuple containing the movie name, year, rating, and poster URL.
         """
-        movie_details = {}
-
         try:
-            request_uri = MovieApp.URI + os.getenv("API_KEY") + f"&t={movie_name}"
-            movie_details = requests.get(request_uri).json()
-            if movie_details["Response"]:
-                movie_name = movie_details["Title"]
-                year = movie_details["Year"]
-                rating = movie_details["imdbRating"]
-                poster = movie_details["Poster"]
-            else:
-                print(Fore.RED + "Movie details not found!")
+            return self.service.fetch_details(movie_name)
+        except MovieNotFoundError:
+            print(Fore.RED + "Movie details not found!")
         except Exception as e:
             print(Fore.RED + f"Error: {e}")
-            print(Fore.YELLOW + "We will get the details manually.")
-            year = self._get_movie_year_manually(movie_name)
-            rating = self._get_movie_rating_manually()
-            poster = self._get_movie_poster_manually()
 
+        print(Fore.YELLOW + "We will get the details manually.")
+        year = self._get_movie_year_manually(movie_name)
+        rating = self._get_movie_rating_manually()
+        poster = self._get_movie_poster_manually()
         return movie_name, year, rating, poster
 
     def _get_movie_rating_manually(self) -> float:
@@ -121,16 +155,58 @@ class MovieApp:
         """
         movie_name = input(Fore.YELLOW + "Enter new movie name: ")
         movie_name, year, rating, poster = self._get_movie_details(movie_name)
-        self.storage.add_movie(movie_name, year, rating, poster)
+        try:
+            self.service.add_movie(movie_name, year, rating, poster)
+        except (MovieExistsError, ValueError) as e:
+            print(Fore.RED + str(e))
+            return
         print(Fore.GREEN + f"{movie_name} added.")
 
+    def import_titles(self, titles, batch_size: int = 100) -> int:
+        """
+        Add many movies without prompting, fetching their details from OMDB.
+
+        Titles are read lazily and handled in batches. The details of a batch
+        are fetched concurrently and written to the storage at once. Titles
+        OMDB does not know are skipped.
+
+        Args:
+            titles (Iterable[str]): The movie titles, e.g. the lines of a file.
+            batch_size (int): Number of titles to fetch before writing them.
+
+        Returns:
+            int: The number of movies added.
+        """
+        result = self.service.import_titles(titles, batch_size)
+        for title, error in result["errors"].items():
+            print(Fore.RED + f"Error fetching '{title}': {error}")
+        for title in result["not_found"]:
+            print(Fore.RED + f"Movie details not found for '{title}'.")
+        print(Fore.GREEN + f"{result['added']} movies imported.")
+        return result["added"]
+
+    def refresh_ratings(self) -> int:
+        """
+        Re-fetch the ratings of all movies from OMDB and store the changed ones.
+
+        Returns:
+            int: The number of movies whose rating changed.
+        """
+        updated = self.service.refresh_ratings(progress=True)
+        print(Fore.GREEN + f"Ratings refreshed, {updated} changed.")
+        return updated
+
     def _delete_movie(self) -> None:
         """
         Delete a movie from the database by prompting the user for the movie name.
         """
         movie = input(Fore.YELLOW + "Enter the movie name to delete: ")
-        self.storage.delete_movie(movie)
-        print(Fore.GREEN + f"{movie} deleted.")
+        try:
+            deleted = self.service.delete_movie(movie)
+        except MovieNotFoundError as e:
+            print(Fore.RED + str(e))
+            return
+        print(Fore.GREEN + f"{deleted['title']} deleted.")
 
     def _update_movie(self) -> None:
         """
@@ -138,91 +214,77 @@ class MovieApp:
         """
         movie = input(Fore.YELLOW + "Enter the movie to update: ")
         new_rating = self._get_movie_rating_manually()
-        self.storage.update_movie(movie, new_rating)
-        print(Fore.GREEN + f"Rating for {movie} updated to {new_rating}.")
-
-    def _average_rating(self, movies: dict) -> float:
-        """
-        Calculate the average rating of all movies in the database.
-
-        Args:
-            movies (dict): A dictionary of movies with details.
-
-        Returns:
-            float: The average rating of the movies.
-        """
-        return sum(float(details["rating"]) for details in movies.values()) / len(
-            movies
-        )
+        try:
+            updated = self.service.update_movie(movie, new_rating)
+        except MovieNotFoundError as e:
+            print(Fore.RED + str(e))
+            return
+        print(Fore.GREEN + f"Rating for {updated['title']} updated to {new_rating}.")
 
-    def _median_rating(self, movies: dict) -> float:
+    def _print_best_movies(self, best: dict) -> None:
         """
-        Calculate the median rating of all movies in the database.
+        Print the best-rated movie(s) in the database.
 
         Args:
-            movies (dict): A dictionary of movies with details.
-
-        Returns:
-            float: The median rating of the movies.
+            best (dict): The best rating and the titles sharing it.
         """
-        ratings = sorted(float(details["rating"]) for details in movies.values())
-        n = len(ratings)
-        mid = n // 2
-        return (ratings[mid] + ratings[-mid - 1]) / 2 if n % 2 == 0 else ratings[mid]
+        print(Fore.GREEN + "Best Movie(s):")
+        for movie in best["titles"]:
+            print(Fore.GREEN + f"\t{movie}: {best['rating']}")
 
-    def _print_best_movies(self, movies: dict) -> None:
+    def _print_worst_movies(self, worst: dict) -> None:
         """
-        Print the best-rated movie(s) in the database.
+        Print the worst-rated movie(s) in the database.
 
         Args:
-            movies (dict): A dictionary of movies with details.
+            worst (dict): The worst rating and the titles sharing it.
         """
-        print(Fore.GREEN + "Best Movie(s):")
-        max_rating = max(float(details["rating"]) for details in movies.values())
-        for movie, details in movies.items():
-            if float(details["rating"]) == max_rating:
-                print(Fore.GREEN + f"\t{movie}: {details['rating']}")
+        print(Fore.RED + "Worst Movie(s):")
+        for movie in worst["titles"]:
+            print(Fore.RED + f"\t{movie}: {worst['rating']}")
 
-    def _print_worst_movies(self, movies: dict) -> None:
+    def _print_year_stats(self, by_year: dict) -> None:
         """
-        Print the worst-rated movie(s) in the database.
+        Print the number of movies and average rating per year.
 
         Args:
-            movies (dict): A dictionary of movies with details.
+            by_year (dict): The count and average rating for each year.
         """
-        print(Fore.RED + "Worst Movie(s):")
-        min_rating = min(float(details["rating"]) for details in movies.values())
-        for movie, details in movies.items():
-            if float(details["rating"]) == min_rating:
-                print(Fore.RED + f"\t{movie}: {details['rating']}")
+        print(Fore.CYAN + "Ratings per year:")
+        for year, year_stats in by_year.items():
+            print(
+                Fore.CYAN + f"\t{year}: {year_stats['count']} movies, "
+                f"average {year_stats['average']:.2f}"
+            )
 
     def _stats(self) -> None:
         """
         Display statistics about the movie ratings in the database.
         """
-        movies = self.storage.list_movies()
-        if not movies:
+        stats = self.service.stats()
+        if not stats["count"]:
             print(Fore.RED + "No movies found to calculate stats.")
             return
-        print(Fore.CYAN + f"Average rating: {self._average_rating(movies):.2f}")
-        print(Fore.CYAN + f"Median rating: {self._median_rating(movies):.2f}")
-        self._print_best_movies(movies)
-        self._print_worst_movies(movies)
+        print(Fore.CYAN + f"Average rating: {stats['average']:.2f}")
+        print(Fore.CYAN + f"Median rating: {stats['median']:.2f}")
+        for percent, rating in stats["percentiles"].items():
+            print(Fore.CYAN + f"{percent}th percentile: {rating:.2f}")
+        self._print_best_movies(stats["best"])
+        self._print_worst_movies(stats["worst"])
+        self._print_year_stats(stats["by_year"])
         input(Fore.GREEN + "\nPress Enter to continue...")
 
     def _random_movie(self) -> None:
         """
         Suggest a random movie from the database.
         """
-        movies = list(self.storage.list_movies().keys())
-        if not movies:
+        movie = self.service.random_movie()
+        if movie is None:
             print(Fore.RED + "No movies found to suggest.")
             return
-        movie = random.choice(movies)
-        rating = self.storage.list_movies()[movie]["rating"]
         print(
-            Fore.CYAN
-            + f"Your movie suggestion for tonight is '{movie}' with a rating of {rating}."
+            Fore.CYAN + f"Your movie suggestion for tonight is '{movie['title']}' "
+            f"with a rating of {movie['rating']}."
         )
         input(Fore.GREEN + "\nPress Enter to continue...")
 
@@ -231,44 +293,72 @@ class MovieApp:
         Search for a movie in the database and suggest similar movies if not found.
         """
         movie = input(Fore.YELLOW + "Enter the movie name to search: ")
-        movies = self.storage.list_movies()
-        if movie in movies:
+        result = self.service.search(movie, limit=3)
+        match = result["match"]
+        if match:
             print(
                 Fore.GREEN
-                + f"The movie '{movie}' has a rating of {movies[movie]['rating']}."
+                + f"The movie '{match['title']}' has a rating of {match['rating']}."
             )
         else:
-            similar_movies = process.extract(
-                movie, movies.keys(), limit=3, scorer=fuzz.ratio
-            )
-            if similar_movies:
+            if result["similar"]:
                 print(Fore.RED + f"The movie '{movie}' does not exist. Did you mean:")
-                for similar_movie, score, _ in similar_movies:
-                    print(Fore.YELLOW + f"- {similar_movie} (similarity: {score}%)")
+                for similar in result["similar"]:
+                    print(
+                        Fore.YELLOW
+                        + f"- {similar['title']} (similarity: {similar['score']}%)"
+                    )
             else:
                 print(Fore.RED + f"No similar movies found for '{movie}'.")
         input(Fore.GREEN + "\nPress Enter to continue...")
 
     def _sort_by_rating(self) -> None:
         """
-        Sort and display movies by their ratings in descending order.
+        Display movies by their ratings in descending order.
+
+        The user can ask for all movies, the best N ("top 20") or a rating
+        range ("7-8").
         """
-        movies = self.storage.list_movies()
-        sorted_movies = sorted(
-            movies.items(), key=lambda x: float(x[1]["rating"]), reverse=True
+        query = input(
+            Fore.YELLOW
+            + "Enter 'top N', a rating range like '7-8', or press Enter for all: "
         )
-        for movie, details in sorted_movies:
-            print(Fore.CYAN + f"{movie}: {details['rating']}")
+        query = query.strip().lower()
+        try:
+            if query.startswith("top"):
+                sorted_movies = self.service.movies_by_rating(0, int(query[3:]))
+            elif query:
+                low, high = (float(bound) for bound in query.split("-", 1))
+                sorted_movies = self.service.rating_range(low, high)
+            else:
+                sorted_movies = self._movies_by_rating()
+        except ValueError:
+            print(Fore.RED + "Invalid input. Please try again.")
+            return
+        for movie in sorted_movies:
+            print(Fore.CYAN + f"{movie['title']}: {movie['rating']}")
         input(Fore.GREEN + "\nPress Enter to continue...")
 
+    def _movies_by_rating(self):
+        """
+        Walk all rated movies, best first, one page of the rating index at a time.
+
+        Yields:
+            dict: Each movie.
+        """
+        offset = 0
+        while page := self.service.movies_by_rating(offset, MovieApp.SORT_PAGE_SIZE):
+            yield from page
+            offset += len(page)
+
     def _list_movies(self) -> None:
         """
         List all movies from the database.
         """
-        movies = self.storage.list_movies()
-        if movies:
-            print(Fore.CYAN + f"\n{len(movies)} movies in total\n")
-            for title, details in movies.items():
+        count = self.service.count()
+        if count:
+            print(Fore.CYAN + f"\n{count} movies in total\n")
+            for title, details in self.storage.iter_movies():
                 print(Fore.CYAN + f"{title}: {details.get('rating', 'N/A')}")
         else:
             print(Fore.RED + "No movies found.")
@@ -278,40 +368,10 @@ class MovieApp:
         """
         Generate a static website displaying the movie collection.
         """
-        # Step 1: Read the template files
-        with open(MovieApp.INDEX_TEMPLATE_PATH, "r") as index_file:
-            index_template = index_file.read()
-
-        with open(MovieApp.MOVIE_TEMPLATE_PATH, "r") as movie_li_file:
-            movie_li_template = movie_li_file.read()
-
-        # Step 2: Get all movies from storage
-        movies = self.storage.list_movies()
-
-        # Step 3: Generate the movie list items
-        movie_list_items = ""
-        for title, details in movies.items():
-            # Replace placeholders in movie_li.html with actual movie details
-            movie_li = movie_li_template.replace(
-                "--movie-poster-link--", details["poster"]
-            )
-            movie_li = movie_li.replace("--movie-name--", title)
-            movie_li = movie_li.replace("--movie-year--", str(details["year"]))
-            movie_list_items += movie_li
-
-        # Step 4: Replace placeholders in index template
-        index_content = index_template.replace(
-            "__TEMPLATE_TITLE__", "My Movie Collection"
-        )
-        index_content = index_content.replace(
-            "__TEMPLATE_MOVIE_GRID__", movie_list_items
-        )
-
-        # Step 5: Write the final HTML content to index.html
-        with open("index.html", "w") as output_file:
-            output_file.write(index_content)
-
-        print(Fore.GREEN + "Website created successfully!")
+        if self.service.build_site():
+            print(Fore.GREEN + "Website created successfully!")
+        else:
+            print(Fore.GREEN + "Website is already up to date.")
 
     def _function_handler(self, choice: str) -> None:
         """
@@ -320,26 +380,8 @@ class MovieApp:
         Args:
             choice (str): The user's menu choice as a string.
         """
-        if choice == "0":
-            MovieApp._exit_app()
-        elif choice == "1":
-            self._list_movies()
-        elif choice == "2":
-            self._add_movie()
-        elif choice == "3":
-            self._delete_movie()
-        elif choice == "4":
-            self._update_movie()
-        elif choice == "5":
-            self._stats()
-        elif choice == "6":
-            self._random_movie()
-        elif choice == "7":
-            self._search_movie()
-        elif choice == "8":
-            self._sort_by_rating()
-        elif choice == "9":
-            self._create_website()
+        if choice.isdigit() and int(choice) < len(MovieApp.MENU_ACTIONS):
+            getattr(self, MovieApp.MENU_ACTIONS[int(choice)])()
         else:
             print(Fore.RED + "\nIncorrect input. Please try again.\n")
 
@@ -349,7 +391,9 @@ class MovieApp:
         """
         while True:
             MovieApp._print_menu()
-            user_choice = input(Fore.YELLOW + "Enter choice (0-9): ")
+            user_choice = input(
+                Fore.YELLOW + f"Enter choice (0-{len(MovieApp.MAIN_MENU_ITEMS) - 1}): "
+            )
             self._function_handler(user_choice)
 
     @classmethod
@@ -408,27 +452,29 @@ class MovieApp:
     @classmethod
     def get_file_name(cls) -> str:
         """
-        Prompt the user to enter a file name ending with .csv or .json.
+        Prompt the user to enter a file name with a supported extension.
 
         Returns:
             str: The file name entered by the user, validated.
         """
         while True:
             file_name = input(
-                Fore.YELLOW + "Please enter a file name ending with .csv or .json: "
+                Fore.YELLOW
+                + f"Please enter a file name ending with {cls._extensions_text()}: "
             )
-            if file_name.endswith((".csv", ".json")):
+            if file_name.endswith(SUPPORTED_EXTENSIONS):
                 file_name = MovieApp._file_exists(file_name)
                 return file_name
             else:
                 print(
-                    Fore.RED + "ERROR: Please enter a name ending with .csv or .json!"
+                    Fore.RED
+                    + f"ERROR: Please enter a name ending with {cls._extensions_text()}!"
                 )
 
     @classmethod
     def verify_file_name(cls, file_name: str) -> str:
         """
-        Verify if the file name ends with .csv or .json, prompting user if necessary.
+        Verify if the file name has a supported extension, prompting if necessary.
 
         Args:
             file_name (str): The initial file name to verify.
@@ -436,14 +482,24 @@ class MovieApp:
         Returns:
             str: The verified file name.
         """
-        if file_name.endswith((".csv", ".json")):
+        if file_name.endswith(SUPPORTED_EXTENSIONS):
             file_name = MovieApp._file_exists(file_name)
             return file_name
         else:
-            print(Fore.RED + "Only csv and json files are supported.")
+            print(Fore.RED + f"Only {cls._extensions_text()} files are supported.")
             file_name = MovieApp.get_file_name()
             return file_name
 
+    @classmethod
+    def _extensions_text(cls) -> str:
+        """
+        Describe the supported file extensions for prompts and errors.
+
+        Returns:
+            str: The extensions, e.g. ".csv, .json or .db".
+        """
+        return ", ".join(SUPPORTED_EXTENSIONS[:-1]) + f" or {SUPPORTED_EXTENSIONS[-1]}"
+
     @classmethod
     def _print_title(cls, msg: str) -> None:
         """
@@ -0,0 +1,474 @@
+import contextlib
+import io
+import itertools
+import math
+import os
+import random
+from typing import TYPE_CHECKING
+
+from backend.rating_refresh import RatingRefresh
+from backend.site_builder import SiteBuilder
+from storage.records import parse_rating, parse_year
+
+if TYPE_CHECKING:
+    # Imported when first used: requests and rapidfuzz are slow to import
+    from backend.omdb_client import OmdbClient
+    from backend.search_index import SearchIndex
+
+
+class MovieNotFoundError(LookupError):
+    """The movie is not in the catalog, or OMDB does not know it."""
+
+
+class MovieExistsError(ValueError):
+    """A movie with the same title is already in the catalog."""
+
+
+class _Discard(io.TextIOBase):
+    """Text stream that drops everything written to it."""
+
+    def write(self, text):
+        return len(text)
+
+
+_DISCARD = _Discard()
+
+
+class MovieService:
+    """
+    The operations of the movie database, without any terminal I/O.
+
+    Every method takes plain arguments and returns plain data (movies as
+    {"title", "year", "rating", "poster"} dicts), so the same operations back
+    the interactive menu, the command line subcommands and the HTTP API.
+    Failures are raised as MovieNotFoundError or MovieExistsError, and
+    invalid ratings and years as ValueError. The messages the storages
+    print are suppressed.
+    """
+
+    INDEX_TEMPLATE_PATH = "templates/index_template.html"
+    MOVIE_TEMPLATE_PATH = "templates/movie_li.html"
+
+    def __init__(
+        self,
+        storage,
+        omdb_client: "OmdbClient" = None,
+        refresh_checkpoint: str = os.path.join("data", ".refresh"),
+        site_builder: SiteBuilder = None,
+        poster_mirror=None,
+    ) -> None:
+        """
+        Initialize the service.
+
+        Args:
+            storage (IStorage): The catalog.
+            omdb_client (OmdbClient): The client used to fetch movie details.
+            refresh_checkpoint (str): The file that tracks an unfinished rating refresh.
+            site_builder (SiteBuilder): The builder used to create the website.
+            poster_mirror (PosterMirror): Mirrors the posters for the website,
+                or None to link to them on OMDB.
+        """
+        self.storage = storage
+        self._omdb_client = omdb_client
+        self.refresh_checkpoint = refresh_checkpoint
+        self.site_builder = site_builder or SiteBuilder(
+            MovieService.INDEX_TEMPLATE_PATH, MovieService.MOVIE_TEMPLATE_PATH
+        )
+        self.poster_mirror = poster_mirror
+        self._search_index = None  # Rebuilt when the catalog version changes
+        self._search_version = None
+
+    @property
+    def omdb_client(self) -> "OmdbClient":
+        """The OMDB client, created the first time it is needed."""
+        if self._omdb_client is None:
+            from backend.omdb_cache import ResponseCache
+            from backend.omdb_client import OmdbClient
+
+            self._omdb_client = OmdbClient(cache=ResponseCache())
+        return self._omdb_client
+
+    @staticmethod
+    def _movie(title: str, details: dict) -> dict:
+        """
+        Flatten a stored movie into one dict.
+
+        Args:
+            title (str): The stored title.
+            details (dict): The stored year, rating and poster.
+
+        Returns:
+            dict: The title, year, rating and poster of the movie.
+        """
+        return {
+            "title": title,
+            "year": details.get("year"),
+            "rating": details.get("rating"),
+            "poster": details.get("poster"),
+        }
+
+    @staticmethod
+    def _movie_row(movie_details):
+        """
+        Pick the fields the storage keeps from an OMDB response.
+
+        OMDB years can be ranges like "2010–2015" for series and ratings
+        "N/A", so they are parsed the way the storages parse them.
+
+        Args:
+            movie_details (dict | None): The OMDB response for a movie.
+
+        Returns:
+            tuple | None: The movie name, year (int or None), rating (float
+                or None) and poster URL, or None if there is no response.
+        """
+        if movie_details is None:
+            return None
+        return (
+            movie_details["Title"],
+            parse_year(movie_details["Year"]),
+            parse_rating(movie_details["imdbRating"]),
+            movie_details["Poster"],
+        )
+
+    @staticmethod
+    def _valid_rating(rating) -> float:
+        """
+        Check a rating given by the user.
+
+        Args:
+            rating (float | str): The rating, a number or a numeric string.
+
+        Returns:
+            float: The rating.
+
+        Raises:
+            ValueError: If the rating is not a number from 0 to 10.
+        """
+        try:
+            if isinstance(rating, bool):
+                raise TypeError
+            value = float(rating)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid rating {rating!r}: it must be a number.")
+        if not math.isfinite(value) or not 0 <= value <= 10:
+            raise ValueError(f"Invalid rating {rating!r}: it must be from 0 to 10.")
+        return value
+
+    @staticmethod
+    def _valid_year(year) -> int:
+        """
+        Check a release year given by the user.
+
+        Args:
+            year (int | str): The year, an int or a string of digits.
+
+        Returns:
+            int: The year.
+
+        Raises:
+            ValueError: If the year is not a whole number.
+        """
+        if isinstance(year, int) and not isinstance(year, bool):
+            return year
+        if isinstance(year, str) and year.strip().isdigit():
+            return int(year)
+        raise ValueError(f"Invalid year {year!r}: it must be a whole number.")
+
+    def batch(self):
+        """
+        Group many changes, so file storages write the catalog only once.
+
+        Returns:
+            ContextManager: Make the changes inside its with block.
+        """
+        return self.storage.batch()
+
+    def list_movies(self, offset: int = 0, limit: int = None) -> list:
+        """
+        List the movies in the order they were added.
+
+        Args:
+            offset (int): Number of movies to skip.
+            limit (int): Maximum number of movies, or None for all.
+
+        Returns:
+            list: The movies.
+        """
+        end = None if limit is None else offset + limit
+        pairs = itertools.islice(self.storage.iter_movies(), offset, end)
+        return [MovieService._movie(title, details) for title, details in pairs]
+
+    def count(self) -> int:
+        """
+        Count the movies.
+
+        Returns:
+            int: The number of movies in the catalog.
+        """
+        return self.storage.count()
+
+    def get_movie(self, title: str) -> dict:
+        """
+        Look a movie up by title, ignoring case.
+
+        Args:
+            title (str): The title.
+
+        Returns:
+            dict: The movie.
+
+        Raises:
+            MovieNotFoundError: If the movie is not in the catalog.
+        """
+        match = self.storage.find_movie(title)
+        if match is None:
+            raise MovieNotFoundError(f"Movie '{title}' not found in the database.")
+        return MovieService._movie(*match)
+
+    def fetch_details(self, title: str) -> tuple:
+        """
+        Fetch the details of a movie from OMDB.
+
+        Args:
+            title (str): The title to look up.
+
+        Returns:
+            tuple: The movie name, year, rating and poster URL. The year and
+                rating are None if OMDB has none that can be parsed.
+
+        Raises:
+            MovieNotFoundError: If OMDB does not know the movie.
+        """
+        row = MovieService._movie_row(self.omdb_client.fetch(title))
+        if row is None:
+            raise MovieNotFoundError(f"Movie details not found for '{title}'.")
+        return row
+
+    def add_movie(self, title: str, year=None, rating=None, poster: str = None) -> dict:
+        """
+        Add a movie, fetching its details from OMDB unless they are given.
+
+        Args:
+            title (str): The title.
+            year (int): The release year, or None to fetch the details.
+            rating (float): The rating, or None to fetch the details.
+            poster (str): The poster URL.
+
+        Returns:
+            dict: The movie as added.
+
+        Raises:
+            ValueError: If the year or the rating given is invalid.
+            MovieExistsError: If the movie is already in the catalog.
+            MovieNotFoundError: If the details had to be fetched and OMDB
+                does not know the movie.
+        """
+        if year is None and rating is None:
+            title, year, rating, poster = self.fetch_details(title)
+        else:
+            if year is not None:
+                year = MovieService._valid_year(year)
+            if rating is not None:
+                rating = MovieService._valid_rating(rating)
+        if self.storage.find_movie(title) is not None:
+            raise MovieExistsError(f"Movie '{title}' already exists in the database.")
+        with contextlib.redirect_stdout(_DISCARD):
+            self.storage.add_movie(title, year, rating, poster)
+        return self.get_movie(title)
+
+    def delete_movie(self, title: str) -> dict:
+        """
+        Delete a movie.
+
+        Args:
+            title (str): The title, in any case.
+
+        Returns:
+            dict: The movie that was deleted.
+
+        Raises:
+            MovieNotFoundError: If the movie is not in the catalog.
+        """
+        movie = self.get_movie(title)
+        with contextlib.redirect_stdout(_DISCARD):
+            self.storage.delete_movie(movie["title"])
+        return movie
+
+    def update_movie(self, title: str, rating: float) -> dict:
+        """
+        Change the rating of a movie.
+
+        Args:
+            title (str): The title, in any case.
+            rating (float): The new rating.
+
+        Returns:
+            dict: The movie as updated.
+
+        Raises:
+            ValueError: If the rating is not a number from 0 to 10.
+            MovieNotFoundError: If the movie is not in the catalog.
+        """
+        rating = MovieService._valid_rating(rating)
+        movie = self.get_movie(title)
+        with contextlib.redirect_stdout(_DISCARD):
+            self.storage.update_movie(movie["title"], rating)
+        return self.get_movie(movie["title"])
+
+    def stats(self, percentiles=(25, 75, 90)) -> dict:
+        """
+        Summarize the ratings.
+
+        Args:
+            percentiles (Iterable[int]): The percentiles to report.
+
+        Returns:
+            dict: The statistics, see CatalogStats.summary().
+        """
+        return self.storage.stats(percentiles)
+
+    def random_movie(self):
+        """
+        Pick a random movie.
+
+        Returns:
+            dict | None: The movie, or None if the catalog is empty.
+        """
+        movies = self.storage.list_movies()
+        if not movies:
+            return None
+        title = random.choice(list(movies))
+        return MovieService._movie(title, movies[title])
+
+    def search(self, query: str, limit: int = 3) -> dict:
+        """
+        Look a movie up, falling back to the most similar titles.
+
+        Args:
+            query (str): The title to search for.
+            limit (int): Maximum number of similar titles.
+
+        Returns:
+            dict: "match", the movie if the title is in the catalog and None
+                otherwise, and "similar", a list of {"title", "score"} dicts
+                for the closest titles if there is no match.
+        """
+        match = self.storage.find_movie(query)
+        if match is not None:
+            return {"match": MovieService._movie(*match), "similar": []}
+        similar = self._get_search_index().search(query, limit=limit)
+        return {
+            "match": None,
+            "similar": [{"title": title, "score": score} for title, score in similar],
+        }
+
+    def _get_search_index(self) -> "SearchIndex":
+        """
+        Get the fuzzy search index, rebuilding it only if the catalog changed.
+
+        Returns:
+            SearchIndex: The index over the current titles.
+        """
+        version = self.storage.catalog_version()
+        if version is None or version != self._search_version:
+            from backend.search_index import SearchIndex
+
+            self._search_index = SearchIndex(self.storage.list_movies().keys())
+            self._search_version = version
+        return self._search_index
+
+    def movies_by_rating(self, offset: int = 0, limit: int = None) -> list:
+        """
+        List the rated movies, best first.
+
+        Args:
+            offset (int): Number of movies to skip.
+            limit (int): Maximum number of movies, or None for all.
+
+        Returns:
+            list: The movies.
+        """
+        pairs = self.storage.movies_by_rating(offset, limit)
+        return [MovieService._movie(title, details) for title, details in pairs]
+
+    def rating_range(self, low: float, high: float) -> list:
+        """
+        List the movies rated from low to high, best first.
+
+        Args:
+            low (float): The lowest rating.
+            high (float): The highest rating.
+
+        Returns:
+            list: The movies.
+        """
+        pairs = self.storage.rating_range(low, high)
+        return [MovieService._movie(title, details) for title, details in pairs]
+
+    def import_titles(self, titles, batch_size: int = 100) -> dict:
+        """
+        Add many movies, fetching their details from OMDB.
+
+        Titles are read lazily and handled in batches. The details of a batch
+        are fetched concurrently and written to the storage at once. Titles
+        OMDB does not know are skipped.
+
+        Args:
+            titles (Iterable[str]): The movie titles, e.g. the lines of a file.
+            batch_size (int): Number of titles to fetch before writing them.
+
+        Returns:
+            dict: "added", the number of movies added, "not_found", the
+                titles OMDB does not know, and "errors", the error message
+                of every title that could not be fetched.
+        """
+        titles = (title.strip() for title in titles)
+        titles = (title for title in titles if title)
+        result = {"added": 0, "not_found": [], "errors": {}}
+        while batch := list(itertools.islice(titles, batch_size)):
+            rows = []
+            for title, movie_details, error in self.omdb_client.fetch_many(batch):
+                if error:
+                    result["errors"][title] = str(error)
+                elif movie_details is None:
+                    result["not_found"].append(title)
+                else:
+                    rows.append(MovieService._movie_row(movie_details))
+            with contextlib.redirect_stdout(_DISCARD):
+                result["added"] += self.storage.add_movies(rows)
+        return result
+
+    def refresh_ratings(self, progress: bool = False) -> int:
+        """
+        Re-fetch the ratings of all movies from OMDB and store the changed ones.
+
+        Args:
+            progress (bool): Print the progress of the refresh.
+
+        Returns:
+            int: The number of movies whose rating changed.
+        """
+        refresh = RatingRefresh(self.storage, self.omdb_client, self.refresh_checkpoint)
+        if progress:
+            return refresh.run()
+        with contextlib.redirect_stdout(_DISCARD):
+            return refresh.run()
+
+    def build_site(self, force: bool = False) -> bool:
+        """
+        Generate the website.
+
+        Args:
+            force (bool): Rebuild even if nothing changed since the last build.
+
+        Returns:
+            bool: True if pages were written, False if the site was up to date.
+        """
+        movies = self.storage.list_movies()
+        poster_paths = None
+        if self.poster_mirror:
+            poster_paths = self.poster_mirror.mirror(
+                details.get("poster") for details in movies.values()
+            )
+        return self.site_builder.build(movies, force=force, poster_paths=poster_paths)
@@ -0,0 +1,163 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    Keep OMDB responses on disk so repeated lookups skip the network.
+
+    Responses are keyed by normalized title and by IMDb id. Entries expire
+    after a time to live, and once the cache is full the least recently used
+    entries are evicted. Lookups are served from memory; the cache file is
+    written by save(), which also runs when the program exits.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("data", ".omdb_cache.json"),
+        ttl: float = 7 * 24 * 60 * 60,
+        max_entries: int = 10000,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            path (str): The file the cache is kept in.
+            ttl (float): Seconds before a cached response expires.
+            max_entries (int): Maximum number of keys to keep.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = None  # key -> (stored_at, response), oldest use first
+        self._dirty = False
+        self._lock = threading.Lock()
+        atexit.register(self.save)
+
+    @staticmethod
+    def title_key(movie_name: str) -> str:
+        """
+        Build the cache key for a title, ignoring case and extra whitespace.
+
+        Args:
+            movie_name (str): The title of the movie.
+
+        Returns:
+            str: The cache key.
+        """
+        return "title:" + " ".join(movie_name.casefold().split())
+
+    @staticmethod
+    def imdb_key(imdb_id: str) -> str:
+        """
+        Build the cache key for an IMDb id.
+
+        Args:
+            imdb_id (str): The IMDb id, e.g. "tt0088247".
+
+        Returns:
+            str: The cache key.
+        """
+        return "imdb:" + imdb_id.strip().lower()
+
+    def get(self, key: str):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): A key from title_key() or imdb_key().
+
+        Returns:
+            tuple: (True, response) on a hit, where response is None for a
+                movie OMDB does not know, or (False, None) on a miss.
+        """
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                if entry is not None:
+                    del entries[key]
+                    self._dirty = True
+                self.misses += 1
+                return False, None
+            entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, movie_name: str, response) -> None:
+        """
+        Cache the response for a title.
+
+        The response is also stored under the title and IMDb id OMDB returned,
+        so later lookups by either hit the cache.
+
+        Args:
+            movie_name (str): The title that was looked up.
+            response (dict | None): The OMDB response, or None if OMDB does
+                not know the movie.
+        """
+        keys = {ResponseCache.title_key(movie_name)}
+        if response is not None:
+            keys.add(ResponseCache.title_key(response["Title"]))
+            if response.get("imdbID"):
+                keys.add(ResponseCache.imdb_key(response["imdbID"]))
+
+        with self._lock:
+            entries = self._load()
+            stored_at = time.time()
+            for key in keys:
+                entries[key] = (stored_at, response)
+                entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._dirty = True
+
+    def stats(self) -> dict:
+        """
+        Report how well the cache is doing.
+
+        Returns:
+            dict: The number of hits, misses and cached keys.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._load()),
+            }
+
+    def save(self) -> None:
+        """
+        Write the cache to its file if it changed.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as file:
+                json.dump([[key, *entry] for key, entry in self._entries.items()], file)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def _load(self) -> OrderedDict:
+        """
+        Read the cache file the first time the cache is used.
+
+        Returns:
+            OrderedDict: The cached entries, least recently used first.
+        """
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                with open(self.path, "r") as file:
+                    for key, stored_at, response in json.load(file):
+                        self._entries[key] = (stored_at, response)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass  # Start with an empty cache
+        return self._entries
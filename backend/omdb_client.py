@@ -0,0 +1,179 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from backend.omdb_cache import ResponseCache
+
+
+class OmdbClient:
+    """
+    Fetch movie details from the OMDB API, one at a time or many concurrently.
+
+    All requests share one pooled requests.Session, so connections are kept
+    alive between calls. Requests time out, and rate limiting (HTTP 429),
+    server errors and connection problems are retried with exponential
+    backoff. Responses are served from a ResponseCache when one is given.
+    The base URL can point at a local stub server instead of omdbapi.com.
+    """
+
+    URI = "http://www.omdbapi.com/"
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str = URI,
+        workers: int = 8,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        cache: ResponseCache = None,
+    ) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            api_key (str): The API key query string, e.g. "apikey=<key>".
+                Defaults to the API_KEY environment variable, which is also
+                read from backend/.env.
+            base_url (str): The URL of the OMDB API.
+            workers (int): Maximum number of requests in flight at once.
+            timeout (float): Seconds to wait for a single response.
+            max_retries (int): Retries for a request before giving up.
+            backoff (float): Seconds to wait before the first retry; doubled
+                for every following one.
+            cache (ResponseCache): Cache for the responses, or None.
+        """
+        if api_key is None:
+            load_dotenv("backend/.env")
+            api_key = os.getenv("API_KEY")
+        self.params = dict(parse_qsl(api_key)) if api_key else None
+        self.base_url = base_url
+        self.workers = workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
+
+    def fetch(self, movie_name: str, use_cache: bool = True):
+        """
+        Fetch the details of a movie by its title.
+
+        Args:
+            movie_name (str): The title of the movie.
+            use_cache (bool): Answer from the cache if possible. The fresh
+                response is cached either way.
+
+        Returns:
+            dict | None: The OMDB response, or None if OMDB does not know the movie.
+
+        Raises:
+            requests.RequestException: If the request still fails after retrying.
+        """
+        if self.cache is not None and use_cache:
+            hit, movie_details = self.cache.get(ResponseCache.title_key(movie_name))
+            if hit:
+                return movie_details
+
+        movie_details = self._request(movie_name)
+        if self.cache is not None:
+            self.cache.put(movie_name, movie_details)
+        return movie_details
+
+    def _request(self, movie_name: str):
+        """
+        Request the details of a movie from OMDB, retrying on transient errors.
+
+        Args:
+            movie_name (str): The title of the movie.
+
+        Returns:
+            dict | None: The OMDB response, or None if OMDB does not know the movie.
+        """
+        if self.params is None:
+            raise RuntimeError("API_KEY is not set, see backend/demo.env")
+
+        params = {**self.params, "t": movie_name}
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.get(
+                    self.base_url, params=params, timeout=self.timeout
+                )
+                if response.status_code not in OmdbClient.RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    movie_details = response.json()
+                    return (
+                        movie_details
+                        if movie_details.get("Response") == "True"
+                        else None
+                    )
+                retry_after = response.headers.get("Retry-After")
+                error = requests.HTTPError(
+                    f"{response.status_code} from {self.base_url}", response=response
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, retry_after))
+        raise error
+
+    def fetch_many(self, movie_names, use_cache: bool = True):
+        """
+        Fetch the details of many movies concurrently.
+
+        Args:
+            movie_names (Iterable[str]): The titles of the movies.
+            use_cache (bool): Answer from the cache where possible.
+
+        Returns:
+            list: One (title, details, error) tuple per title, in input order.
+                details is the OMDB response or None, error the exception
+                raised while fetching it or None.
+        """
+
+        def fetch_one(movie_name):
+            try:
+                return movie_name, self.fetch(movie_name, use_cache), None
+            except Exception as e:
+                return movie_name, None, e
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(fetch_one, movie_names))
+        if self.cache is not None:
+            self.cache.save()
+        return results
+
+    def _retry_delay(self, attempt: int, retry_after) -> float:
+        """
+        Calculate how long to wait before retrying a request.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+            retry_after (str | None): The Retry-After header of the response.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Jitter keeps the worker threads from retrying in lockstep
+        return self.backoff * 2**attempt * random.uniform(0.5, 1.5)
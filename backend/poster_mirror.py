@@ -0,0 +1,172 @@
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PosterMirror:
+    """
+    Keep local copies of the movie posters for the website.
+
+    Posters are downloaded concurrently into an asset directory and stored
+    under the hash of their content, so a poster shared by several URLs is
+    saved once. Posters that are already mirrored are revalidated with
+    conditional requests (ETag / Last-Modified) at most once per
+    revalidate_after seconds, and only downloaded again if they changed.
+    """
+
+    def __init__(
+        self,
+        asset_dir: str = "posters",
+        workers: int = 8,
+        timeout: float = 10.0,
+        revalidate_after: float = 24 * 60 * 60,
+    ) -> None:
+        """
+        Initialize the mirror.
+
+        Args:
+            asset_dir (str): The directory for the posters, relative to the website.
+            workers (int): Maximum number of downloads in flight at once.
+            timeout (float): Seconds to wait for a single response.
+            revalidate_after (float): Seconds before a mirrored poster is
+                checked for changes again.
+        """
+        self.asset_dir = asset_dir
+        self.manifest_path = os.path.join(asset_dir, "manifest.json")
+        self.workers = workers
+        self.timeout = timeout
+        self.revalidate_after = revalidate_after
+        self._manifest = None  # URL -> {"file", "etag", "last_modified", "checked_at"}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def mirror(self, urls) -> dict:
+        """
+        Make sure the posters are mirrored.
+
+        Args:
+            urls (Iterable[str]): The poster URLs. Anything that is not an
+                http(s) URL, such as OMDB's "N/A", is ignored.
+
+        Returns:
+            dict: The local path of every poster that could be mirrored, by URL.
+        """
+        os.makedirs(self.asset_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        urls = {url for url in urls if url and url.startswith(("http://", "https://"))}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            failures = sum(not ok for ok in executor.map(self._mirror_one, urls))
+        if failures:
+            print(f"{failures} posters could not be mirrored, using their URLs.")
+        self._save_manifest()
+
+        return {
+            url: f"{self.asset_dir}/{manifest[url]['file']}"
+            for url in urls
+            if url in manifest
+        }
+
+    def _mirror_one(self, url: str) -> bool:
+        """
+        Download a poster unless the mirrored copy is still current.
+
+        Args:
+            url (str): The poster URL.
+
+        Returns:
+            bool: True if there is a current local copy.
+        """
+        with self._lock:
+            entry = self._manifest.get(url)
+        if entry and not os.path.exists(os.path.join(self.asset_dir, entry["file"])):
+            entry = None
+        if entry and time.time() - entry["checked_at"] < self.revalidate_after:
+            return True
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and entry:
+                file_name = entry["file"]
+                # A 304 may leave out the validators, which are then unchanged
+                etag = response.headers.get("ETag", entry.get("etag"))
+                last_modified = response.headers.get(
+                    "Last-Modified", entry.get("last_modified")
+                )
+            else:
+                response.raise_for_status()
+                file_name = self._store(response)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except requests.RequestException:
+            return entry is not None  # Keep serving the old copy if there is one
+
+        with self._lock:
+            self._manifest[url] = {
+                "file": file_name,
+                "etag": etag,
+                "last_modified": last_modified,
+                "checked_at": time.time(),
+            }
+        return True
+
+    def _store(self, response) -> str:
+        """
+        Save a downloaded poster under the hash of its content.
+
+        Args:
+            response (requests.Response): The poster download.
+
+        Returns:
+            str: The file name of the poster in the asset directory.
+        """
+        content = response.content
+        content_type = response.headers.get("Content-Type", "").split(";")[0]
+        extension = mimetypes.guess_extension(content_type) or ".jpg"
+        file_name = hashlib.sha256(content).hexdigest() + extension
+        path = os.path.join(self.asset_dir, file_name)
+        if not os.path.exists(path):
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as poster_file:
+                poster_file.write(content)
+            os.replace(temp_path, path)
+        return file_name
+
+    def _load_manifest(self) -> dict:
+        """
+        Read the manifest of mirrored posters the first time it is needed.
+
+        Returns:
+            dict: The mirrored posters by URL.
+        """
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, "r") as manifest_file:
+                    self._manifest = json.load(manifest_file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self) -> None:
+        """
+        Write the manifest of mirrored posters.
+        """
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump(self._manifest, manifest_file)
+        os.replace(temp_path, self.manifest_path)
@@ -0,0 +1,140 @@
+import json
+import os
+
+from colorama import Fore
+
+from storage.records import parse_rating
+
+
+class RatingRefresh:
+    """
+    Re-sync the ratings of a whole catalog with OMDB.
+
+    The catalog is walked in chunks whose ratings are fetched concurrently.
+    Only ratings that actually changed are collected, and they are written to
+    the storage with a single update_movies() call at the end. Progress is
+    saved to a checkpoint file after every chunk, so an interrupted refresh
+    picks up where it stopped.
+    """
+
+    def __init__(
+        self, storage, omdb_client, checkpoint_path: str, chunk_size: int = 200
+    ) -> None:
+        """
+        Initialize the refresh.
+
+        Args:
+            storage (IStorage): The catalog to refresh.
+            omdb_client (OmdbClient): The client used to fetch the ratings.
+            checkpoint_path (str): The file progress is saved to.
+            chunk_size (int): Number of titles fetched between checkpoints.
+        """
+        self.storage = storage
+        self.omdb_client = omdb_client
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+
+    def run(self) -> int:
+        """
+        Refresh all ratings, resuming from the checkpoint if there is one.
+
+        Titles that could not be fetched stay pending in the checkpoint, so
+        running the refresh again retries only those.
+
+        Returns:
+            int: The number of movies whose rating changed.
+        """
+        done, changes = self._load_checkpoint()
+        if done:
+            print(Fore.YELLOW + f"Resuming refresh, {len(done)} movies already done.")
+            # Start from one clean line in case the last append was torn
+            self._rewrite_checkpoint(done, changes)
+
+        movies = self.storage.list_movies()
+        pending = [title for title in movies if title not in done]
+        failed = 0
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start : start + self.chunk_size]
+            results = self.omdb_client.fetch_many(chunk, use_cache=False)
+            chunk_done, chunk_changes = [], {}
+            for title, movie_details, error in results:
+                if error:
+                    print(Fore.RED + f"Error fetching '{title}': {error}")
+                    failed += 1
+                    continue
+                chunk_done.append(title)
+                if movie_details is None:
+                    continue
+                new_rating = movie_details["imdbRating"]
+                new_value = parse_rating(new_rating)
+                if new_value is not None and new_value != parse_rating(
+                    movies[title]["rating"]
+                ):
+                    chunk_changes[title] = new_rating
+            changes.update(chunk_changes)
+            self._append_checkpoint(chunk_done, chunk_changes)
+            print(
+                Fore.CYAN + f"Refreshed {start + len(chunk)}/{len(pending)} movies, "
+                f"{len(changes)} changed so far."
+            )
+
+        updated = self.storage.update_movies(changes) if changes else 0
+        if failed:
+            # Keep the finished titles so a rerun only retries the failures
+            done, _ = self._load_checkpoint()
+            self._rewrite_checkpoint(done, {})
+            print(Fore.YELLOW + f"{failed} movies failed, run the refresh again.")
+        elif os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return updated
+
+    def _load_checkpoint(self) -> tuple:
+        """
+        Read the progress of an interrupted refresh.
+
+        Returns:
+            tuple: The set of finished titles and the {title: rating} changes
+                found so far.
+        """
+        done, changes = set(), {}
+        try:
+            with open(self.checkpoint_path, "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn last line from an interrupted append
+                    done.update(entry["done"])
+                    changes.update(entry["changes"])
+        except FileNotFoundError:
+            pass
+        return done, changes
+
+    def _rewrite_checkpoint(self, done: set, changes: dict) -> None:
+        """
+        Replace the checkpoint with a single entry.
+
+        Args:
+            done (set): The titles that are finished.
+            changes (dict): The {title: rating} changes not yet applied.
+        """
+        # Swap the new file in atomically, so an interruption keeps the old one
+        temp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            file.write(json.dumps({"done": sorted(done), "changes": changes}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _append_checkpoint(self, done: list, changes: dict) -> None:
+        """
+        Record the progress of one chunk, so saving stays cheap for big catalogs.
+
+        Args:
+            done (list): The titles finished in the chunk.
+            changes (dict): The {title: rating} changes found in the chunk.
+        """
+        with open(self.checkpoint_path, "a") as file:
+            file.write(json.dumps({"done": done, "changes": changes}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
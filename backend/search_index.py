@@ -0,0 +1,182 @@
+import heapq
+from collections import Counter, defaultdict
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+
+class SearchIndex:
+    """
+    Fuzzy title search over a fixed set of titles.
+
+    Titles are normalized once when the index is built, and an inverted index
+    of their character trigrams narrows each query down to the titles sharing
+    the most trigrams with it before they are scored with fuzz.ratio. Queries
+    too short to have trigrams are scored against every title, in one batch on
+    all cores when numpy is installed. Build a new index when the catalog
+    changes.
+    """
+
+    GRAM_SIZE = 3
+    # Trigrams shared by fewer titles than this are always used to prefilter
+    COMMON_GRAM_MIN = 1000
+
+    def __init__(self, titles, candidate_limit: int = 500) -> None:
+        """
+        Build the index.
+
+        Args:
+            titles (Iterable[str]): The titles to search.
+            candidate_limit (int): Titles scored per query after the trigram
+                prefilter.
+        """
+        self.titles = list(titles)
+        self.processed = [default_process(title) for title in self.titles]
+        self.candidate_limit = candidate_limit
+        self._grams = defaultdict(list)  # trigram -> indexes of the titles
+        for index, processed in enumerate(self.processed):
+            for gram in SearchIndex._trigrams(processed):
+                self._grams[gram].append(index)
+
+    def search(self, query: str, limit: int = 3) -> list:
+        """
+        Find the titles most similar to a query.
+
+        Args:
+            query (str): The text to search for.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: (title, score) tuples, best match first.
+        """
+        return self.search_many([query], limit)[0]
+
+    def search_many(self, queries, limit: int = 3) -> list:
+        """
+        Find the titles most similar to each of many queries.
+
+        Args:
+            queries (Iterable[str]): The texts to search for.
+            limit (int): Maximum number of results per query.
+
+        Returns:
+            list: One list of (title, score) tuples per query, best match first.
+        """
+        queries = [default_process(query) for query in queries]
+        results = [None] * len(queries)
+        unfiltered = []
+        for position, query in enumerate(queries):
+            candidates = self._candidates(query)
+            if candidates is None:
+                unfiltered.append(position)
+                continue
+            choices = {index: self.processed[index] for index in candidates}
+            results[position] = self._results(
+                process.extract(
+                    query, choices, scorer=fuzz.ratio, processor=None, limit=limit
+                )
+            )
+
+        if unfiltered:
+            for position, matches in zip(
+                unfiltered, self._score_all([queries[p] for p in unfiltered], limit)
+            ):
+                results[position] = matches
+        return results
+
+    def _candidates(self, query: str):
+        """
+        Pick the titles sharing the most trigrams with a query.
+
+        Args:
+            query (str): The normalized query.
+
+        Returns:
+            list | None: Indexes of the candidate titles, or None if the query
+                has no trigrams in common with any title.
+        """
+        postings = [self._grams.get(gram) for gram in SearchIndex._trigrams(query)]
+        postings = sorted((posting for posting in postings if posting), key=len)
+        if not postings:
+            return None
+
+        # Trigrams found in a large share of the titles (" th", "the", ...)
+        # say little and are expensive to count, so skip them if rarer ones exist
+        common = max(SearchIndex.COMMON_GRAM_MIN, len(self.titles) // 20)
+        postings = [posting for posting in postings if len(posting) <= common] or (
+            postings[:1]
+        )
+        shared = Counter()
+        for posting in postings:
+            shared.update(posting)
+        return heapq.nlargest(self.candidate_limit, shared, key=shared.__getitem__)
+
+    def _score_all(self, queries: list, limit: int) -> list:
+        """
+        Score queries against every title.
+
+        Args:
+            queries (list): The normalized queries.
+            limit (int): Maximum number of results per query.
+
+        Returns:
+            list: One list of (title, score) tuples per query, best match first.
+        """
+        try:
+            import numpy
+        except ImportError:
+            return [
+                self._results(
+                    process.extract(
+                        query,
+                        self.processed,
+                        scorer=fuzz.ratio,
+                        processor=None,
+                        limit=limit,
+                    )
+                )
+                for query in queries
+            ]
+
+        # float64, as the default float32 would round the scores differently
+        # from process.extract()
+        scores = process.cdist(
+            queries,
+            self.processed,
+            scorer=fuzz.ratio,
+            processor=None,
+            dtype=numpy.float64,
+            workers=-1,
+        )
+        results = []
+        for row in scores:
+            best = numpy.argsort(-row, kind="stable")[:limit]
+            results.append([(self.titles[index], float(row[index])) for index in best])
+        return results
+
+    def _results(self, matches) -> list:
+        """
+        Turn rapidfuzz matches back into the original titles.
+
+        Args:
+            matches (list): (choice, score, index) tuples from process.extract.
+
+        Returns:
+            list: (title, score) tuples.
+        """
+        return [(self.titles[index], score) for _, score, index in matches]
+
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        """
+        Split normalized text into its character trigrams.
+
+        Args:
+            text (str): The normalized text.
+
+        Returns:
+            set: The trigrams, padded so short words still have some.
+        """
+        padded = f" {text} "
+        size = SearchIndex.GRAM_SIZE
+        return {padded[i : i + size] for i in range(len(padded) - size + 1)}
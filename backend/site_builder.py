@@ -0,0 +1,498 @@
+import hashlib
+import itertools
+import json
+import math
+import os
+import re
+from collections.abc import Mapping
+
+from storage.records import parse_rating, parse_year
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal text and placeholders.
+
+    Rendering joins the pieces in a single pass instead of scanning the whole
+    template again for every placeholder.
+    """
+
+    def __init__(self, text: str, placeholders) -> None:
+        """
+        Compile the template.
+
+        Args:
+            text (str): The template text.
+            placeholders (Iterable[str]): The placeholders used in the text.
+        """
+        pattern = "(" + "|".join(re.escape(name) for name in placeholders) + ")"
+        # re.split with a group alternates literal text and placeholder names
+        self.parts = re.split(pattern, text)
+
+    def render(self, values: dict) -> str:
+        """
+        Fill in the placeholders.
+
+        Args:
+            values (dict): The text for each placeholder.
+
+        Returns:
+            str: The rendered template.
+        """
+        return CompiledTemplate._join(self.parts, values)
+
+    def render_around(self, placeholder: str, values: dict) -> tuple:
+        """
+        Render the text before and after a placeholder, to stream its content.
+
+        Args:
+            placeholder (str): The placeholder the caller fills in itself.
+            values (dict): The text for the other placeholders.
+
+        Returns:
+            tuple: The rendered text before and after the placeholder.
+        """
+        index = self.parts.index(placeholder)
+        # index is odd, so both slices still start with literal text
+        return (
+            CompiledTemplate._join(self.parts[:index], values),
+            CompiledTemplate._join(self.parts[index + 1 :], values),
+        )
+
+    @staticmethod
+    def _join(parts: list, values: dict) -> str:
+        """
+        Join literal text and filled in placeholders.
+
+        Args:
+            parts (list): Literal text at even, placeholder names at odd indexes.
+            values (dict): The text for each placeholder.
+
+        Returns:
+            str: The joined text.
+        """
+        return "".join(
+            [
+                part if index % 2 == 0 else values[part]
+                for index, part in enumerate(parts)
+            ]
+        )
+
+
+class _LocalPosters(Mapping):
+    """
+    A view of the movies with poster URLs replaced by local paths.
+
+    Details are copied one movie at a time while iterating, so the catalog is
+    never duplicated in memory.
+    """
+
+    def __init__(self, movies, poster_paths: dict) -> None:
+        self._movies = movies
+        self._poster_paths = poster_paths
+
+    def __getitem__(self, title):
+        return self._local(self._movies[title])
+
+    def __iter__(self):
+        return iter(self._movies)
+
+    def __len__(self):
+        return len(self._movies)
+
+    def items(self):
+        for title, details in self._movies.items():
+            yield title, self._local(details)
+
+    def _local(self, details: dict) -> dict:
+        local_path = self._poster_paths.get(details.get("poster"))
+        return {**details, "poster": local_path} if local_path else details
+
+
+def _write_page(path: str, head: str, tail: str, movie_template, rows) -> None:
+    """
+    Stream one page to disk, replacing the old page atomically.
+
+    This is a module level function so it can run in a worker process.
+
+    Args:
+        path (str): The page to write.
+        head (str): The page up to the movie list.
+        tail (str): The page after the movie list.
+        movie_template (CompiledTemplate): The template for one movie.
+        rows (Iterable[tuple]): The (title, details) of the movies on the page.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as output_file:
+        output_file.write(head)
+        render_movie = movie_template.render
+        for title, details in rows:
+            output_file.write(render_movie(SiteBuilder._movie_values(title, details)))
+        output_file.write(tail)
+    os.replace(temp_path, path)
+
+
+class SiteBuilder:
+    """
+    Write the movie collection to static HTML pages.
+
+    Movie list items are streamed straight into the output files, so building
+    takes linear time however big the catalog is. The collection can be split
+    into pages of page_size movies, and into one section per year or rating
+    bucket, with navigation links between them. Pages are written by a pool
+    of worker processes. A hash of the catalog, templates and options is kept
+    next to the site, and the site is only rebuilt when it changes.
+    """
+
+    MOVIE_PLACEHOLDERS = ("--movie-poster-link--", "--movie-name--", "--movie-year--")
+    INDEX_PLACEHOLDERS = (
+        "__TEMPLATE_TITLE__",
+        "__TEMPLATE_MOVIE_GRID__",
+        "__TEMPLATE_PAGINATION__",
+    )
+    SHARD_KEYS = ("year", "rating")
+    # Page links shown on either side of the current page
+    NAV_WINDOW = 3
+
+    def __init__(
+        self,
+        index_template_path: str,
+        movie_template_path: str,
+        output_path: str = "index.html",
+        title: str = "My Movie Collection",
+        page_size: int = None,
+        shard_by: str = None,
+        workers: int = None,
+    ) -> None:
+        """
+        Initialize the builder.
+
+        Args:
+            index_template_path (str): The page template.
+            movie_template_path (str): The template for one movie list item.
+            output_path (str): The first page to write; the other pages are
+                written next to it.
+            title (str): The title shown on the pages.
+            page_size (int): Movies per page, or None for a single page.
+            shard_by (str): "year" or "rating" to give every year or whole
+                rating its own section, or None.
+            workers (int): Processes writing pages; defaults to the CPU count.
+        """
+        if shard_by not in (None, *SiteBuilder.SHARD_KEYS):
+            raise ValueError(f"Cannot shard the website by '{shard_by}'.")
+        self.index_template_path = index_template_path
+        self.movie_template_path = movie_template_path
+        self.output_path = output_path
+        self.output_dir = os.path.dirname(output_path)
+        self.page_stem = os.path.splitext(os.path.basename(output_path))[0]
+        self.hash_path = output_path + ".catalog-hash"
+        self.title = title
+        self.page_size = page_size
+        self.shard_by = shard_by
+        self.workers = workers or os.cpu_count() or 1
+        self._template_texts = None
+        self._index_template = None
+        self._movie_template = None
+
+    def build(self, movies, force: bool = False, poster_paths: dict = None) -> bool:
+        """
+        Write the site unless it is already up to date.
+
+        Args:
+            movies (dict): The movies to show, as returned by list_movies().
+            force (bool): Rebuild even if nothing changed.
+            poster_paths (dict): Local paths to use instead of poster URLs,
+                e.g. from PosterMirror.mirror().
+
+        Returns:
+            bool: True if the site was written, False if it was up to date.
+        """
+        if poster_paths:
+            movies = _LocalPosters(movies, poster_paths)
+        self._load_templates()
+        content_hash = self._content_hash(movies)
+        old_manifest = self._read_manifest()
+        if (
+            not force
+            and old_manifest.get("hash") == content_hash
+            and os.path.exists(self.output_path)
+        ):
+            return False
+
+        pages = self._write_pages(self._page_jobs(movies))
+        for stale_page in set(old_manifest.get("pages", [])) - set(pages):
+            stale_path = os.path.join(self.output_dir, stale_page)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+        with open(self.hash_path, "w") as hash_file:
+            json.dump({"hash": content_hash, "pages": pages}, hash_file)
+        return True
+
+    def _write_pages(self, jobs) -> list:
+        """
+        Write the pages, in worker processes if there is more than one.
+
+        Args:
+            jobs (Iterator[tuple]): The (file name, title, navigation, rows)
+                of every page.
+
+        Returns:
+            list: The file names of the written pages.
+        """
+        first_job = next(jobs)
+        second_job = next(jobs, None)
+        if second_job is None:
+            # A single page is streamed in this process without copying its rows
+            _write_page(*self._page_args(*first_job))
+            return [first_job[0]]
+
+        pages = []
+        jobs = itertools.chain([first_job, second_job], jobs)
+        if self.workers == 1:
+            for job in jobs:
+                pages.append(job[0])
+                _write_page(*self._page_args(*job))
+            return pages
+
+        # Only imported for multi-page sites, it is slow to import
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = set()
+            for job in jobs:
+                if len(in_flight) >= 2 * self.workers:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()
+                pages.append(job[0])
+                path, head, tail, movie_template, rows = self._page_args(*job)
+                in_flight.add(
+                    executor.submit(
+                        _write_page, path, head, tail, movie_template, list(rows)
+                    )
+                )
+            for future in in_flight:
+                future.result()
+        return pages
+
+    def _page_args(self, page_name: str, title: str, navigation: str, rows) -> tuple:
+        """
+        Prepare the arguments of _write_page() for a page.
+
+        Args:
+            page_name (str): The file name of the page.
+            title (str): The title shown on the page.
+            navigation (str): The HTML of the navigation links.
+            rows (Iterable[tuple]): The (title, details) of the movies on the page.
+
+        Returns:
+            tuple: The path, head, tail, movie template and rows of the page.
+        """
+        head, tail = self._index_template.render_around(
+            "__TEMPLATE_MOVIE_GRID__",
+            {"__TEMPLATE_TITLE__": title, "__TEMPLATE_PAGINATION__": navigation},
+        )
+        path = os.path.join(self.output_dir, page_name)
+        return path, head, tail, self._movie_template, rows
+
+    def _page_jobs(self, movies):
+        """
+        Split the movies into pages.
+
+        Args:
+            movies (dict): The movies to show.
+
+        Yields:
+            tuple: The file name, title, navigation HTML and movie rows of
+                every page.
+        """
+        if self.shard_by is None:
+            yield from self._shard_pages(None, len(movies), iter(movies.items()), "")
+            return
+
+        shards = {}
+        for title, details in movies.items():
+            shards.setdefault(self._shard_key(details), []).append((title, details))
+        shard_names = sorted(shards, key=self._shard_sort_key)
+        shard_links = " ".join(
+            f'<a href="{self._page_name(shard, 1)}">{shard}</a>'
+            for shard in shard_names
+        )
+        shard_nav = f'<div class="shards">{shard_links}</div>'
+
+        yield f"{self.page_stem}.html", self.title, shard_nav, []
+        for shard in shard_names:
+            rows = shards.pop(shard)
+            yield from self._shard_pages(shard, len(rows), iter(rows), shard_nav)
+
+    def _shard_pages(self, shard, count: int, rows, shard_nav: str):
+        """
+        Split the movies of one section into pages.
+
+        Args:
+            shard (str | None): The section, or None if the site is not sharded.
+            count (int): The number of movies in the section.
+            rows (Iterator[tuple]): The (title, details) of the movies.
+            shard_nav (str): The HTML of the links to all sections.
+
+        Yields:
+            tuple: The file name, title, navigation HTML and movie rows of
+                every page.
+        """
+        page_size = self.page_size or max(count, 1)
+        page_count = max(1, math.ceil(count / page_size))
+        title = self.title
+        if shard is not None:
+            title = f"{self.title} - {self.shard_by.capitalize()} {shard}"
+        for page in range(1, page_count + 1):
+            page_rows = (
+                rows if page_count == 1 else list(itertools.islice(rows, page_size))
+            )
+            navigation = shard_nav + self._page_nav(shard, page, page_count)
+            yield self._page_name(shard, page), title, navigation, page_rows
+
+    def _page_name(self, shard, page: int) -> str:
+        """
+        Name the file of a page.
+
+        Args:
+            shard (str | None): The section, or None if the site is not sharded.
+            page (int): The number of the page within the section.
+
+        Returns:
+            str: The file name, e.g. "index.html" or "year-1984-page-2.html".
+        """
+        stem = self.page_stem if shard is None else f"{self.shard_by}-{shard}"
+        return f"{stem}.html" if page == 1 else f"{stem}-page-{page}.html"
+
+    def _page_nav(self, shard, page: int, page_count: int) -> str:
+        """
+        Build the links to the first, last and nearby pages of a section.
+
+        Args:
+            shard (str | None): The section, or None if the site is not sharded.
+            page (int): The number of the current page.
+            page_count (int): The number of pages in the section.
+
+        Returns:
+            str: The navigation HTML, empty for a single page.
+        """
+        if page_count == 1:
+            return ""
+        window = range(
+            max(1, page - SiteBuilder.NAV_WINDOW),
+            min(page_count, page + SiteBuilder.NAV_WINDOW) + 1,
+        )
+        links = []
+        previous = 0
+        for number in sorted({1, *window, page_count}):
+            if number > previous + 1:
+                links.append("<span>&hellip;</span>")
+            if number == page:
+                links.append(f'<span class="current">{number}</span>')
+            else:
+                links.append(f'<a href="{self._page_name(shard, number)}">{number}</a>')
+            previous = number
+        return '<div class="pages">' + " ".join(links) + "</div>"
+
+    def _shard_key(self, details: dict) -> str:
+        """
+        Find the section a movie belongs to.
+
+        Args:
+            details (dict): The stored details of the movie.
+
+        Returns:
+            str: The year or whole rating, or "unknown".
+        """
+        if self.shard_by == "year":
+            value = parse_year(details["year"])
+        else:
+            rating = parse_rating(details["rating"])
+            value = math.floor(rating) if rating is not None else None
+        return str(value) if value is not None else "unknown"
+
+    def _shard_sort_key(self, shard: str) -> tuple:
+        """
+        Order sections by year, or best rating first, with "unknown" last.
+
+        Args:
+            shard (str): The section.
+
+        Returns:
+            tuple: The sort key.
+        """
+        if shard == "unknown":
+            return (1, 0)
+        return (0, int(shard) if self.shard_by == "year" else -int(shard))
+
+    @staticmethod
+    def _movie_values(title: str, details: dict) -> dict:
+        """
+        Map the movie template placeholders to the details of a movie.
+
+        Args:
+            title (str): The title of the movie.
+            details (dict): The stored details of the movie.
+
+        Returns:
+            dict: The text for each placeholder.
+        """
+        return {
+            "--movie-poster-link--": details.get("poster") or "",
+            "--movie-name--": title,
+            "--movie-year--": str(details["year"]),
+        }
+
+    def _load_templates(self) -> None:
+        """
+        Read the templates and compile them again if they changed.
+        """
+        texts = []
+        for path in (self.index_template_path, self.movie_template_path):
+            with open(path, "r") as template_file:
+                texts.append(template_file.read())
+        if texts != self._template_texts:
+            index_text, movie_text = texts
+            self._index_template = CompiledTemplate(
+                index_text, SiteBuilder.INDEX_PLACEHOLDERS
+            )
+            self._movie_template = CompiledTemplate(
+                movie_text, SiteBuilder.MOVIE_PLACEHOLDERS
+            )
+            self._template_texts = texts
+
+    def _content_hash(self, movies) -> str:
+        """
+        Hash everything that ends up in the page.
+
+        Args:
+            movies (dict): The movies to show.
+
+        Returns:
+            str: The hex digest.
+        """
+        digest = hashlib.sha256()
+        options = (self.title, str(self.page_size), str(self.shard_by))
+        for text in (*self._template_texts, *options):
+            digest.update(text.encode())
+            digest.update(b"\0")
+        for title, details in movies.items():
+            values = SiteBuilder._movie_values(title, details)
+            digest.update("\0".join(values.values()).encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def _read_manifest(self) -> dict:
+        """
+        Read the hash and page list of the last build.
+
+        Returns:
+            dict: The manifest, empty if there was no build yet.
+        """
+        try:
+            with open(self.hash_path, "r") as hash_file:
+                return json.load(hash_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
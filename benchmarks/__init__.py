@@ -0,0 +1,8 @@
+"""
+Benchmarks for the storages and the movie database operations.
+
+Run them from the repository root, e.g.:
+
+    python -m benchmarks.run --sizes 1000 10000 --output before.json
+    python -m benchmarks.stress_storage --file stress.json
+"""
@@ -0,0 +1,37 @@
+import random
+
+_WORDS = (
+    "alien amber angel arrow autumn blade blood bridge broken city cold crown "
+    "dark dawn dead desert dragon dream empire eternal falcon fire forest "
+    "ghost glass golden harbor heart hidden hunter ice iron island jungle "
+    "kingdom last legend light lost machine midnight mirror moon mountain "
+    "night ocean orbit paper phantom planet queen rain red river road "
+    "secret shadow silent silver sky snow song star steel storm summer sun "
+    "thunder tide tower train valley velvet war water whisper wild winter wolf"
+).split()
+
+
+def movie_rows(count, seed=0):
+    """
+    Generate a synthetic catalog.
+
+    Titles are made of a few random words plus a number, so they are unique
+    but still look enough alike for fuzzy search to have work to do.
+
+    Args:
+        count (int): Number of movies.
+        seed (int): Seed of the random generator, the same seed gives the
+            same catalog.
+
+    Yields:
+        tuple: The (title, year, rating, poster) of each movie, as taken by
+            IStorage.add_movies().
+    """
+    generator = random.Random(seed)
+    for index in range(count):
+        words = generator.sample(_WORDS, generator.randint(1, 3))
+        title = " ".join(words).title() + f" {index}"
+        year = generator.randint(1920, 2024)
+        rating = round(generator.uniform(1.0, 10.0), 1)
+        poster = f"https://m.media-amazon.com/images/M/{index:010d}.jpg"
+        yield title, year, rating, poster
@@ -0,0 +1,236 @@
+"""
+Benchmark the storages and the movie database operations.
+
+For every catalog size and storage backend a synthetic catalog is loaded
+into a scratch directory, then every operation is timed. OMDB is replaced by
+a local stub server. The results are printed as JSON, so runs can be saved
+and diffed:
+
+    python -m benchmarks.run --sizes 1000 10000 --output before.json
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.movie_service import MovieService  # noqa: E402
+from backend.omdb_client import OmdbClient  # noqa: E402
+from benchmarks.catalog import movie_rows  # noqa: E402
+from benchmarks.stub_omdb import StubOmdbServer  # noqa: E402
+from storage.factory import open_storage  # noqa: E402
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend name -> (file name, open_storage() options)
+BACKENDS = {
+    "json": ("bench.json", {}),
+    "json-journal": ("bench.json", {"journaled": True}),
+    "json-columnar": ("bench.json", {"columnar": True}),
+    "csv": ("bench.csv", {}),
+    "csv-stream": ("bench.csv", {"streaming": True}),
+    "sqlite": ("bench.db", {}),
+    "mdb": ("bench.mdb", {}),
+}
+
+# Operations that take long on big catalogs run at most this often
+SLOW_REPEAT = 3
+
+# Every operation of a streaming backend reads the whole file, so even its
+# fast operations run at most this often
+STREAMING_REPEAT = 10
+
+
+def percentile(latencies, percent):
+    """Returns the nearest-rank percentile of sorted latencies."""
+    rank = max(int(round(percent / 100 * len(latencies) + 0.5)) - 1, 0)
+    return latencies[min(rank, len(latencies) - 1)]
+
+
+def measure(name, operation, repeat):
+    """
+    Time an operation and measure its peak memory.
+
+    Args:
+        name (str): The name of the operation in the report.
+        operation (Callable): Called with the number of the run, 0 to repeat.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: The latency percentiles in milliseconds, the throughput and
+            the peak memory allocated by one more, traced run.
+    """
+    latencies = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        operation(run)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    # Tracing slows Python down, so measure memory on a separate run
+    tracemalloc.start()
+    operation(repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "operation": name,
+        "runs": repeat,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "ops_per_sec": round(repeat / total, 1) if total else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def operations(service, file_name, options, titles, repeat):
+    """
+    List the operations to time for one catalog.
+
+    Args:
+        service (MovieService): The service over the loaded catalog.
+        file_name (str): The catalog file, to open it again cold.
+        options (dict): The open_storage() options of the backend.
+        titles (list): The titles in the catalog.
+        repeat (int): Number of timed runs of the fast operations.
+
+    Returns:
+        list: (name, operation, runs) tuples, in the order to run them.
+    """
+    generator = random.Random(1)
+
+    def pick(_):
+        return generator.choice(titles)
+
+    def iterate_all(_):
+        for _ in service.storage.iter_movies():
+            pass
+
+    def import_titles(run):
+        service.import_titles(f"Imported {run} {index}" for index in range(20))
+
+    return [
+        ("open", lambda _: len(open_storage(file_name, **options).list_movies()), 3),
+        ("add", lambda run: service.add_movie(f"New movie {run}", 2020, 7.5), repeat),
+        (
+            "update",
+            lambda _: service.update_movie(pick(_), generator.uniform(1, 10)),
+            repeat,
+        ),
+        ("delete", lambda run: service.delete_movie(f"New movie {run}"), repeat),
+        ("find", lambda _: service.get_movie(pick(_)), repeat),
+        ("search", lambda _: service.search(pick(_)[:-3] + "x"), repeat),
+        ("list_page", lambda _: service.list_movies(0, 50), repeat),
+        ("list_all", iterate_all, SLOW_REPEAT),
+        ("stats", lambda _: service.stats(), repeat),
+        ("sort_top_100", lambda _: service.movies_by_rating(0, 100), repeat),
+        ("build_site", lambda _: service.build_site(force=True), SLOW_REPEAT),
+        ("import_20", import_titles, SLOW_REPEAT),
+    ]
+
+
+def bench_backend(backend, size, repeat, omdb_url):
+    """
+    Load a catalog into a backend and time every operation on it.
+
+    Args:
+        backend (str): The name of the backend, see BACKENDS.
+        size (int): Number of movies in the catalog.
+        repeat (int): Number of timed runs of the fast operations.
+        omdb_url (str): The URL of the stub OMDB server.
+
+    Returns:
+        list: One result dict per operation.
+    """
+    file_name, options = BACKENDS[backend]
+    if options.get("streaming"):
+        repeat = min(repeat, STREAMING_REPEAT)
+    work_dir = tempfile.mkdtemp(prefix="movie-bench-")
+    old_dir = os.getcwd()
+    try:
+        os.chdir(work_dir)
+        os.mkdir("data")
+        shutil.copytree(os.path.join(_REPO_DIR, "templates"), "templates")
+
+        rows = list(movie_rows(size))
+        titles = [row[0] for row in rows]
+        storage = open_storage(file_name, **options)
+        client = OmdbClient(api_key="apikey=bench", base_url=omdb_url, cache=None)
+        service = MovieService(storage, omdb_client=client)
+
+        # The traced run of the bulk load finds every movie already there, so
+        # its peak memory is that of checking a full batch for duplicates
+        load = [("load", lambda _: storage.add_movies(iter(rows)), 1)]
+        results = []
+        for name, operation, runs in itertools.chain(
+            load, operations(service, file_name, options, titles, repeat)
+        ):
+            print(f"{backend} {size}: {name}", file=sys.stderr)
+            result = measure(name, operation, runs)
+            results.append({"backend": backend, "size": size, **result})
+        client.close()
+        return results
+    finally:
+        os.chdir(old_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="Catalog sizes, e.g. 1000 10000 100000 1000000",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=BACKENDS,
+        default=list(BACKENDS),
+        help="Storage backends to benchmark",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=50, help="Timed runs of the fast operations"
+    )
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    results = []
+    with StubOmdbServer() as stub:
+        # The storages and the service report to stdout; keep it for the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for size in args.sizes:
+                for backend in args.backends:
+                    results.extend(bench_backend(backend, size, args.repeat, stub.url))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Measure how long the app takes to start.
+
+Times importing main.py with python -X importtime, and starting the menu
+on a new catalog and exiting it at once. Also checks that none of the slow
+to import dependencies are loaded before they are needed, and exits with
+status 1 if one is, or if importing takes longer than --max-import-ms:
+
+    python -m benchmarks.startup --runs 20 --max-import-ms 60
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the actions that need them may import
+DEFERRED_MODULES = (
+    "requests",
+    "rapidfuzz",
+    "dotenv",
+    "asyncio",
+    "sqlite3",
+    "mmap",
+    "cProfile",
+    "concurrent.futures.process",
+)
+
+
+def import_times(module="main"):
+    """
+    Import a module in a new interpreter with -X importtime.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        dict: The cumulative import time in milliseconds of the module and
+            of every module its import loaded, by name.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", where the
+        # modules a module imports are listed indented, right before it
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        times[name] = int(fields[1]) / 1000
+        if not fields[2].startswith("  "):
+            # A module imported directly, e.g. by site before the import
+            if name == module:
+                return times
+            times = {}
+    raise RuntimeError(f"-X importtime did not report {module}")
+
+
+def loaded_deferred_modules(module="main"):
+    """Returns the DEFERRED_MODULES that importing a module loads."""
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=_REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set(json.loads(result.stdout))
+    return [name for name in DEFERRED_MODULES if name in loaded]
+
+
+def menu_time_ms():
+    """Returns the wall time to start the menu on a new catalog and exit."""
+    with tempfile.TemporaryDirectory(prefix="movie-startup-") as work_dir:
+        os.mkdir(os.path.join(work_dir, "data"))
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(_REPO_DIR, "main.py"), "-f", "new.json"],
+            cwd=work_dir,
+            input="0\n",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        default=None,
+        help="Fail if the median import time of main.py is longer",
+    )
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    main_times = [times["main"] for times in runs]
+    menu_times = [menu_time_ms() for _ in range(args.runs)]
+    loaded = loaded_deferred_modules()
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_main_ms": {
+            "median": round(statistics.median(main_times), 1),
+            "min": round(min(main_times), 1),
+        },
+        "menu_start_and_exit_ms": {
+            "median": round(statistics.median(menu_times), 1),
+            "min": round(min(menu_times), 1),
+        },
+        "slowest_imports_ms": {
+            name: round(ms, 1)
+            for name, ms in sorted(runs[-1].items(), key=lambda item: -item[1])[1:11]
+        },
+        "deferred_modules_loaded": loaded,
+    }
+    print(json.dumps(report, indent=2))
+
+    too_slow = (
+        args.max_import_ms is not None
+        and report["import_main_ms"]["median"] > args.max_import_ms
+    )
+    sys.exit(1 if loaded or too_slow else 0)
+
+
+if __name__ == "__main__":
+    main()
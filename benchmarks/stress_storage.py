@@ -0,0 +1,86 @@
+"""
+Stress test concurrent writers on one catalog file.
+
+Starts several processes that each add movies to the same catalog at the
+same time, then checks that every single one of them made it into the file.
+Run from the repository root:
+
+    python -m benchmarks.stress_storage --file stress.json --processes 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.factory import open_storage  # noqa: E402
+
+
+def _writer(file_name, worker, writes, options):
+    """Adds writes movies to the catalog, one add_movie() call each."""
+    storage = open_storage(file_name, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(writes):
+            storage.add_movie(f"Worker {worker} movie {index}", 2000, 5.0, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file", default="stress.json", help="Catalog file name")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=50, help="Movies per process")
+    parser.add_argument("--journal", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    options = {}
+    if args.journal:
+        options["journaled"] = True
+    if args.stream:
+        options["streaming"] = True
+
+    # Work in a scratch directory, the storages use its "data" directory
+    os.chdir(tempfile.mkdtemp(prefix="movie-stress-"))
+    os.mkdir("data")
+
+    start = time.perf_counter()
+    workers = [
+        multiprocessing.Process(
+            target=_writer, args=(args.file, worker, args.writes, options)
+        )
+        for worker in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    seconds = time.perf_counter() - start
+
+    expected = args.processes * args.writes
+    stored = len(open_storage(args.file, **options).list_movies())
+    print(
+        json.dumps(
+            {
+                "file": args.file,
+                "processes": args.processes,
+                "writes": expected,
+                "stored": stored,
+                "lost": expected - stored,
+                "seconds": round(seconds, 3),
+                "writes_per_second": round(expected / seconds, 1),
+            },
+            indent=2,
+        )
+    )
+    sys.exit(1 if stored != expected else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers OMDB title lookups with made-up but stable details."""
+
+    # Keep the connections of the client's pool open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        title = parse_qs(urlsplit(self.path).query).get("t", [""])[0]
+        if title.lower().startswith("failing"):
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if title.lower().startswith("unknown"):
+            movie_details = {"Response": "False", "Error": "Movie not found!"}
+        else:
+            # Derive the details from the title, so every run gets the same
+            checksum = zlib.crc32(title.encode())
+            movie_details = {
+                "Title": title,
+                "Year": str(1920 + checksum % 105),
+                "imdbRating": f"{1 + checksum % 90 / 10:.1f}",
+                "Poster": f"https://m.media-amazon.com/images/M/{checksum}.jpg",
+                "imdbID": f"tt{checksum:08d}",
+                "Response": "True",
+            }
+            # Series span years and new titles have no rating yet, like on OMDB
+            if title.lower().startswith("series"):
+                year = int(movie_details["Year"])
+                movie_details["Year"] = f"{year}–{year + 5}"
+            if title.lower().startswith("unrated"):
+                movie_details["imdbRating"] = "N/A"
+        body = json.dumps(movie_details).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the benchmark output clean
+
+
+class _StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when all the client's
+    # workers connect at once, and a dropped SYN is only retried after 1s
+    request_queue_size = 64
+    daemon_threads = True
+
+
+class StubOmdbServer:
+    """
+    A local stand-in for the OMDB API, served from a background thread.
+
+    Titles starting with "unknown" are answered as not found, titles
+    starting with "failing" with a server error, and anything else with
+    details derived from the title. Titles starting with "series" get a
+    range of years like "2010–2015", and those starting with "unrated" the
+    rating "N/A". Use it as a context manager and
+    point an OmdbClient at its url.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on, 0 for any free port.
+        """
+        self._server = _StubServer((host, port), _StubHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """The base URL to give to OmdbClient."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,8 +1,16 @@
 import argparse
+import atexit
+import json
+import os
+import sys
 
 from backend.movie_app import MovieApp
-from storage.storage_csv import StorageCsv
-from storage.storage_json import StorageJson
+from backend.site_builder import SiteBuilder
+from storage.convert import catalog_checksum, convert_catalog
+from storage.factory import SUPPORTED_EXTENSIONS, open_storage
+
+# Set to 1 to time the calls like --profile, or to a directory like --cprofile
+PROFILE_ENV = "MOVIE_PROFILE"
 
 
 def main():
@@ -15,9 +23,110 @@ def main():
 
     # Add an optional argument for the filename
     parser.add_argument("-f", "--file", type=str, help="Database file", default=None)
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Journal changes to JSON files instead of rewriting them",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Keep CSV and JSON catalogs in memory column by column to save memory",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read and rewrite CSV files row by row instead of loading them",
+    )
+    parser.add_argument(
+        "--import",
+        dest="import_file",
+        type=str,
+        default=None,
+        help="Add the titles listed one per line in this file ('-' for stdin) "
+        "without prompting, then exit",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-fetch all ratings from OMDb without prompting, then exit",
+    )
+
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=None,
+        help="Split the website into pages of this many movies",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SiteBuilder.SHARD_KEYS,
+        default=None,
+        help="Give every year or whole rating its own section of the website",
+    )
+
+    parser.add_argument(
+        "--mirror-posters",
+        action="store_true",
+        help="Download the posters next to the website instead of linking to them",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time the storage and app operations and print a summary on exit "
+        f"(or set {PROFILE_ENV}=1)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="DIR",
+        default=None,
+        help="Like --profile, and write the cProfile stats of every menu action "
+        f"or command to this directory (or set {PROFILE_ENV}=DIR)",
+    )
+
+    add_commands(parser)
 
     # Parse the arguments
     args = parser.parse_args()
+    instrumentation = start_instrumentation(args)
+
+    if args.command == "convert":
+        convert(parser, args)
+        return
+    if args.command:
+        movie_app = batch_app(parser, args, args.command, instrumentation)
+        if args.command == "batch":
+            run_batch(movie_app.service, sys.stdin, sys.stdout)
+            return
+        if args.command == "serve":
+            from backend.api_server import ApiServer
+
+            ApiServer(movie_app.service, args.host, args.port).serve()
+            return
+        params = {
+            name: value
+            for name, value in vars(args).items()
+            if name in COMMAND_PARAMS[args.command]
+        }
+        try:
+            if instrumentation:
+                with instrumentation.profiled(f"command.{args.command}"):
+                    result = run_command(movie_app.service, args.command, params)
+            else:
+                result = run_command(movie_app.service, args.command, params)
+        except (LookupError, ValueError) as e:
+            print(json.dumps({"error": str(e)}))
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        return
+    if args.import_file:
+        movie_app = batch_app(parser, args, "--import", instrumentation)
+        import_titles(movie_app, args.import_file)
+        return
+    if args.refresh:
+        batch_app(parser, args, "--refresh", instrumentation).refresh_ratings()
+        return
 
     MovieApp._print_title("Welcome to the movie database")
 
@@ -27,12 +136,326 @@ def main():
     else:
         file_name = MovieApp.get_file_name()
 
-    storage = (
-        StorageCsv(file_name) if file_name.endswith(".csv") else StorageJson(file_name)
-    )
-    movie_app = MovieApp(storage)
+    movie_app = create_app(file_name, args, instrumentation)
     movie_app.run()
 
 
+def start_instrumentation(args):
+    """
+    Instrument the app if --profile, --cprofile or the environment asks for it.
+
+    The summary is printed to stderr when the program exits.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        Instrumentation | None: The instrumentation, or None if not enabled.
+    """
+    setting = os.getenv(PROFILE_ENV, "")
+    profile_dir = args.cprofile
+    if profile_dir is None and setting not in ("", "0", "1"):
+        profile_dir = setting
+    if not (args.profile or profile_dir or setting == "1"):
+        return None
+
+    from backend.instrumentation import Instrumentation
+    from backend.movie_service import MovieService
+    from backend.omdb_client import OmdbClient
+    from backend.search_index import SearchIndex
+
+    instrumentation = Instrumentation(profile_dir)
+    instrumentation.instrument_class(MovieApp, profile=MovieApp.MENU_ACTIONS)
+    for cls in (MovieService, OmdbClient, SearchIndex, SiteBuilder):
+        instrumentation.instrument_class(cls)
+    atexit.register(instrumentation.report)
+    return instrumentation
+
+
+def add_commands(parser):
+    """
+    Add the subcommands that run one operation and print the result as JSON.
+
+    Args:
+        parser (argparse.ArgumentParser): The main parser.
+    """
+    commands = parser.add_subparsers(
+        dest="command",
+        title="commands",
+        description="Run one operation on the --file database without prompting "
+        "and print the result as JSON. Without a command the menu is started.",
+    )
+    list_parser = commands.add_parser("list", help="List the movies")
+    list_parser.add_argument("--offset", type=int, default=0)
+    list_parser.add_argument("--limit", type=int, default=None)
+
+    add_parser = commands.add_parser(
+        "add", help="Add a movie, fetching its details unless they are given"
+    )
+    add_parser.add_argument("title")
+    add_parser.add_argument("--year", type=int, default=None)
+    add_parser.add_argument("--rating", type=float, default=None)
+    add_parser.add_argument("--poster", default=None)
+
+    delete_parser = commands.add_parser("delete", help="Delete a movie")
+    delete_parser.add_argument("title")
+
+    update_parser = commands.add_parser("update", help="Change a movie's rating")
+    update_parser.add_argument("title")
+    update_parser.add_argument("rating", type=float)
+
+    commands.add_parser("stats", help="Show the rating statistics")
+
+    search_parser = commands.add_parser(
+        "search", help="Find a movie, or the most similar titles"
+    )
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=3)
+
+    build_parser = commands.add_parser("build-site", help="Generate the website")
+    build_parser.add_argument(
+        "--force", action="store_true", help="Rebuild even if nothing changed"
+    )
+
+    serve_parser = commands.add_parser(
+        "serve", help="Serve the database as a JSON HTTP API until interrupted"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+
+    convert_parser = commands.add_parser(
+        "convert",
+        help="Copy a catalog into a new file of another format, e.g. "
+        "old.json new.csv, and verify the copy",
+    )
+    convert_parser.add_argument("source", help="The catalog to copy")
+    convert_parser.add_argument("destination", help="The new catalog")
+    convert_parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Movies written at once"
+    )
+
+    commands.add_parser(
+        "batch",
+        help="Run the commands read from stdin, one JSON object per line like "
+        '{"command": "add", "title": "Alien"}, printing one result per line',
+    )
+
+
+# The parameters each command takes, by name
+COMMAND_PARAMS = {
+    "list": ("offset", "limit"),
+    "add": ("title", "year", "rating", "poster"),
+    "delete": ("title",),
+    "update": ("title", "rating"),
+    "stats": (),
+    "search": ("query", "limit"),
+    "build-site": ("force",),
+}
+
+
+def run_command(service, command, params):
+    """
+    Run one operation on the database.
+
+    Args:
+        service (MovieService): The service working on the database.
+        command (str): The name of the command, e.g. "add".
+        params (dict): The parameters of the command, see COMMAND_PARAMS.
+
+    Returns:
+        object: The result, ready to be serialized as JSON.
+
+    Raises:
+        LookupError: If the movie is not in the database.
+        ValueError: If the command is unknown, a parameter is missing or
+            invalid, or the movie already exists.
+    """
+    for name in ("title", "query"):
+        if name in params and not isinstance(params[name], str):
+            raise ValueError(f"Parameter '{name}' for '{command}' must be a string.")
+    try:
+        return _dispatch(service, command, params)
+    except KeyError as e:
+        raise ValueError(f"Missing parameter {e} for '{command}'.")
+
+
+def _dispatch(service, command, params):
+    """Calls the service method of a command, see run_command()."""
+    if command == "list":
+        return service.list_movies(params.get("offset", 0), params.get("limit"))
+    elif command == "add":
+        return service.add_movie(
+            params["title"],
+            params.get("year"),
+            params.get("rating"),
+            params.get("poster"),
+        )
+    elif command == "delete":
+        return service.delete_movie(params["title"])
+    elif command == "update":
+        return service.update_movie(params["title"], params["rating"])
+    elif command == "stats":
+        return service.stats()
+    elif command == "search":
+        return service.search(params["query"], params.get("limit", 3))
+    elif command == "build-site":
+        return {"written": service.build_site(params.get("force", False))}
+    raise ValueError(f"Unknown command '{command}'.")
+
+
+def run_batch(service, requests, output):
+    """
+    Run the commands read one JSON object per line, printing a result each.
+
+    Every result is a JSON line with "ok" and either "result" or "error", so
+    a failing command, including one with parameters of the wrong type, does
+    not stop the batch. File databases are written
+    once, after the last command.
+
+    Args:
+        service (MovieService): The service working on the database.
+        requests (Iterable[str]): The lines with the commands.
+        output (TextIO): Where the results are written.
+    """
+    with service.batch():
+        for line in requests:
+            if not line.strip():
+                continue
+            try:
+                params = json.loads(line)
+                if not isinstance(params, dict):
+                    raise ValueError("Every line must be a JSON object.")
+                result = run_command(service, params.pop("command", None), params)
+                response = {"ok": True, "result": result}
+            except (LookupError, ValueError, TypeError, AttributeError) as e:
+                response = {"ok": False, "error": str(e)}
+            output.write(json.dumps(response) + "\n")
+
+
+def convert(parser, args):
+    """
+    Copy the source catalog into the destination and verify the copy.
+
+    The source is streamed: CSV and JSON files are read one movie at a time
+    and SQLite databases row by row. Progress is reported on stderr and the
+    result printed as JSON; the exit status is 1 if the source does not
+    exist or the copy differs.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser, used to report errors.
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    for file_name in (args.source, args.destination):
+        if not file_name.endswith(SUPPORTED_EXTENSIONS):
+            parser.error(f"convert needs a supported extension, not '{file_name}'")
+    if args.source == args.destination:
+        parser.error("convert needs two different files")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    def progress(copied):
+        print(f"\r{copied} movies copied", end="", file=sys.stderr, flush=True)
+
+    # Opening a missing database would create it, and a missing file would
+    # read as an empty catalog that copies and verifies fine
+    if not os.path.exists(os.path.join("data", args.source)):
+        print(json.dumps({"error": f"The source '{args.source}' does not exist."}))
+        sys.exit(1)
+    source = open_storage(args.source, streaming=True)
+    try:
+        result = convert_catalog(
+            source,
+            open_storage(args.destination, streaming=True),
+            args.batch_size,
+            progress,
+        )
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+    print(file=sys.stderr)
+
+    # Read the new file back with a fresh storage, not from its cache
+    count, checksum = catalog_checksum(
+        open_storage(args.destination, streaming=True).iter_movies()
+    )
+    result["verified"] = (count, checksum) == (result["read"], result["checksum"])
+    print(json.dumps(result, indent=2))
+    if not result["verified"]:
+        sys.exit(1)
+
+
+def create_app(file_name, args, instrumentation=None):
+    """
+    Create the MovieApp for a database file.
+
+    Args:
+        file_name (str): Name of the database file in the "data" directory.
+        args (argparse.Namespace): The parsed command line arguments.
+        instrumentation (Instrumentation): Times the storage too, if given.
+
+    Returns:
+        MovieApp: The app working on the file.
+    """
+    storage = open_storage(
+        file_name,
+        journaled=args.journal,
+        columnar=args.columnar,
+        streaming=args.stream,
+    )
+    if instrumentation:
+        instrumentation.watch_storage(storage)
+    refresh_checkpoint = os.path.join("data", file_name + ".refresh")
+    site_builder = SiteBuilder(
+        MovieApp.INDEX_TEMPLATE_PATH,
+        MovieApp.MOVIE_TEMPLATE_PATH,
+        page_size=args.page_size,
+        shard_by=args.shard_by,
+    )
+    poster_mirror = None
+    if args.mirror_posters:
+        from backend.poster_mirror import PosterMirror
+
+        poster_mirror = PosterMirror()
+    return MovieApp(
+        storage,
+        refresh_checkpoint=refresh_checkpoint,
+        site_builder=site_builder,
+        poster_mirror=poster_mirror,
+    )
+
+
+def batch_app(parser, args, option, instrumentation=None):
+    """
+    Create the MovieApp for a non-interactive run, which needs --file.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser, used to report errors.
+        args (argparse.Namespace): The parsed command line arguments.
+        option (str): The option that asked for the batch run.
+        instrumentation (Instrumentation): Times the storage too, if given.
+
+    Returns:
+        MovieApp: The app working on the file given with --file.
+    """
+    if not args.file or not args.file.endswith(SUPPORTED_EXTENSIONS):
+        parser.error(f"{option} needs a database --file with a supported extension")
+    return create_app(args.file, args, instrumentation)
+
+
+def import_titles(movie_app, import_file):
+    """
+    Add the titles listed in the import file to the database.
+
+    Args:
+        movie_app (MovieApp): The app working on the database.
+        import_file (str): The file with one title per line, or "-" for stdin.
+    """
+    if import_file == "-":
+        movie_app.import_titles(sys.stdin)
+    else:
+        with open(import_file, "r") as titles:
+            movie_app.import_titles(titles)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+from storage.records import parse_rating, parse_year
+from storage.sorted_index import SortedIndex
+
+
+class CatalogStats:
+    """
+    Running rating statistics of a catalog.
+
+    The sum and count of the ratings and a SortedIndex of (rating, title)
+    pairs are updated as movies are added, changed and removed. Averages,
+    medians, percentiles and the best and worst movies are then read off
+    directly instead of scanning and sorting the whole catalog. Positions in
+    the index are found by binary search; inserting and removing shift the
+    list with a single memmove.
+    """
+
+    def __init__(self, movies=None):
+        """
+        Args:
+            movies (dict): Movies to start with, as returned by list_movies().
+        """
+        self._sum = 0.0
+        self._unrated = 0
+        self._years = {}  # year -> [count, sum of ratings]
+        pairs = []
+        for title, details in (movies or {}).items():
+            self._count_movie(title, details, pairs.append)
+        self.by_rating = SortedIndex(pairs)  # One sort instead of an insert each
+
+    def add(self, title, details):
+        """Counts a movie in the statistics."""
+        self._count_movie(title, details, lambda pair: self.by_rating.add(*pair))
+
+    def _count_movie(self, title, details, store_pair):
+        """Counts a movie, handing its (rating, title) pair to store_pair."""
+        rating = parse_rating(details.get("rating"))
+        if rating is None:
+            self._unrated += 1
+            return
+        self._sum += rating
+        store_pair((rating, title))
+        year = parse_year(details.get("year"))
+        if year is not None:
+            year_stats = self._years.setdefault(year, [0, 0.0])
+            year_stats[0] += 1
+            year_stats[1] += rating
+
+    def remove(self, title, details):
+        """Takes a movie out of the statistics."""
+        rating = parse_rating(details.get("rating"))
+        if rating is None:
+            self._unrated -= 1
+            return
+        self._sum -= rating
+        self.by_rating.remove(rating, title)
+        year = parse_year(details.get("year"))
+        if year is not None:
+            year_stats = self._years[year]
+            year_stats[0] -= 1
+            year_stats[1] -= rating
+            if not year_stats[0]:
+                del self._years[year]
+
+    def percentile(self, percent):
+        """Returns the rating below which percent % of the ratings fall."""
+        ratings = self.by_rating
+        if not ratings:
+            return None
+        # Interpolate between the closest ranks, so the 50th is the median
+        position = (len(ratings) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ratings) - 1)
+        fraction = position - lower
+        return ratings[lower][0] * (1 - fraction) + ratings[upper][0] * fraction
+
+    def summary(self, percentiles=(25, 75, 90)):
+        """
+        Returns the statistics as a dict.
+
+        Args:
+            percentiles (Iterable[int]): The percentiles to report.
+
+        Returns:
+            dict: The count of rated and unrated movies, the average and
+                median rating, the requested percentiles, the best and worst
+                movies and the count and average rating per year. The rating
+                values are None if no movie is rated.
+        """
+        ratings = self.by_rating
+        count = len(ratings)
+        return {
+            "count": count,
+            "unrated": self._unrated,
+            "average": self._sum / count if count else None,
+            "median": self.percentile(50),
+            "percentiles": {
+                percent: self.percentile(percent) for percent in percentiles
+            },
+            "best": self._extreme(reverse=True),
+            "worst": self._extreme(reverse=False),
+            "by_year": {
+                year: {"count": year_count, "average": year_sum / year_count}
+                for year, (year_count, year_sum) in sorted(self._years.items())
+            },
+        }
+
+    def _extreme(self, reverse):
+        """Returns the highest or lowest rating and the titles sharing it."""
+        ratings = self.by_rating
+        if not ratings:
+            return {"rating": None, "titles": []}
+        pairs = reversed(ratings) if reverse else iter(ratings)
+        rating, title = next(pairs)
+        titles = [title]
+        for other_rating, other_title in pairs:
+            if other_rating != rating:
+                break
+            titles.append(other_title)
+        return {"rating": rating, "titles": titles[::-1] if reverse else titles}
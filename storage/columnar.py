@@ -0,0 +1,96 @@
+import math
+from array import array
+from collections.abc import MutableMapping
+
+from storage.records import parse_rating, parse_year
+
+
+class ColumnarCatalog(MutableMapping):
+    """
+    A catalog stored column by column instead of as one dict per movie.
+
+    Each title is stored once, shared by the row list and the title lookup,
+    years are kept in an array('H') (0 if unknown),
+    ratings in an array('f') (NaN if unknown) and posters as indexes into a
+    table of the distinct poster URLs. Reading a movie builds its details
+    dict on the fly, so existing callers keep working with the usual
+    {"year", "rating", "poster"} dicts, but changing such a dict does not
+    change the catalog; assign it back instead.
+
+    Deleted rows are left as holes, so the insertion order is kept, and the
+    columns are compacted once more than half of the rows are holes.
+    """
+
+    def __init__(self, movies=()):
+        """
+        Args:
+            movies (dict | Iterable[tuple]): Movies to start with, as a dict
+                like list_movies() returns or as (title, details) pairs.
+        """
+        self._titles = []  # None marks a deleted row
+        self._years = array("H")
+        self._ratings = array("f")
+        self._posters = array("I")
+        self._poster_table = [None]  # Poster URLs, shared by all the rows
+        self._poster_ids = {None: 0}  # Poster URL -> index in the table
+        self._rows = {}  # Title -> row
+        self.update(movies)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return (title for title in self._titles if title is not None)
+
+    def __contains__(self, title):
+        return title in self._rows
+
+    def __getitem__(self, title):
+        row = self._rows[title]
+        rating = self._ratings[row]
+        return {
+            "year": self._years[row] or None,
+            # Undo the float32 rounding, e.g. 8.699999809 back to 8.7
+            "rating": None if math.isnan(rating) else float(f"{rating:.6g}"),
+            "poster": self._poster_table[self._posters[row]],
+        }
+
+    def __setitem__(self, title, details):
+        row = self._rows.get(title)
+        if row is None:
+            row = self._rows[title] = len(self._titles)
+            self._titles.append(title)
+            self._years.append(0)
+            self._ratings.append(math.nan)
+            self._posters.append(0)
+
+        self._years[row] = parse_year(details.get("year")) or 0
+        rating = parse_rating(details.get("rating"))
+        self._ratings[row] = math.nan if rating is None else rating
+        self._posters[row] = self._poster_id(details.get("poster"))
+
+    def __delitem__(self, title):
+        row = self._rows.pop(title)
+        self._titles[row] = None
+        if len(self._titles) > 2 * len(self._rows):
+            self._compact()
+
+    def _poster_id(self, poster):
+        """Returns the index of a poster URL in the table, adding it if new."""
+        poster_id = self._poster_ids.get(poster)
+        if poster_id is None:
+            poster_id = self._poster_ids[poster] = len(self._poster_table)
+            self._poster_table.append(poster)
+        return poster_id
+
+    def _compact(self):
+        """Drops the holes left by deleted rows and the unused posters."""
+        rows = [self._rows[title] for title in self]
+        posters = [self._poster_table[self._posters[row]] for row in rows]
+        self._titles = [self._titles[row] for row in rows]
+        self._years = array("H", (self._years[row] for row in rows))
+        self._ratings = array("f", (self._ratings[row] for row in rows))
+        self._poster_table = [None]
+        self._poster_ids = {None: 0}
+        self._posters = array("I", (self._poster_id(poster) for poster in posters))
+        self._rows = {title: row for row, title in enumerate(self._titles)}
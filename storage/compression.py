@@ -0,0 +1,80 @@
+import gzip
+import lzma
+import os
+from contextlib import contextmanager
+
+# Suffix -> module that opens files compressed that way, and its options
+_CODECS = {
+    ".gz": (gzip, {"compresslevel": 6}),
+    ".xz": (lzma, {}),
+}
+
+
+def split_compression(file_name):
+    """
+    Split the compression suffix off a catalog file name.
+
+    Args:
+        file_name (str): The file name, e.g. "movies.json.gz".
+
+    Returns:
+        tuple: The name without the suffix, e.g. "movies.json", and the
+            suffix, ".gz" or ".xz", or None if the file is not compressed.
+    """
+    for suffix in _CODECS:
+        if file_name.endswith(suffix):
+            return file_name[: -len(suffix)], suffix
+    return file_name, None
+
+
+def open_reader(path, compression=None, newline=None):
+    """
+    Open a text file for reading, decompressing it as it is read.
+
+    Args:
+        path (str): The path of the file.
+        compression (str): ".gz" or ".xz", or None for a plain file.
+        newline (str): Passed on to open(), "" for CSV files.
+
+    Returns:
+        TextIO: The open file.
+    """
+    if compression is None:
+        return open(path, "r", newline=newline)
+    module, _ = _CODECS[compression]
+    return module.open(path, "rt", newline=newline)
+
+
+@contextmanager
+def open_writer(path, mode="w", compression=None, newline=None):
+    """
+    Open a text file for writing or appending, compressing it as it is written.
+
+    The file is synced to disk when the with block ends, after the end of
+    the compressed stream has been written.
+
+    Args:
+        path (str): The path of the file.
+        mode (str): "w" to write a new file or "a" to append to it. Appending
+            to a compressed file adds a new compressed stream, which is read
+            back as if the file had been written at once.
+        compression (str): ".gz" or ".xz", or None for a plain file.
+        newline (str): Passed on to open(), "" for CSV files.
+
+    Yields:
+        TextIO: The open file.
+    """
+    if compression is None:
+        with open(path, mode, newline=newline) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        return
+
+    module, options = _CODECS[compression]
+    with open(path, mode + "b") as raw:
+        # Closing the text stream finishes the compressed one, not raw
+        with module.open(raw, mode + "t", newline=newline, **options) as file:
+            yield file
+        raw.flush()
+        os.fsync(raw.fileno())
@@ -0,0 +1,102 @@
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+
+from storage.records import parse_rating, parse_year
+
+_CHECKSUM_MASK = (1 << 64) - 1
+
+
+def movie_digest(title, details):
+    """
+    Hash a movie the same way whatever storage it was read from.
+
+    The year and rating are parsed and a missing poster is None, since the
+    storages keep them as strings, numbers or empty fields.
+
+    Args:
+        title (str): The title.
+        details (dict): The year, rating and poster.
+
+    Returns:
+        int: A 64-bit hash of the movie.
+    """
+    row = [
+        title,
+        parse_year(details.get("year")),
+        parse_rating(details.get("rating")),
+        details.get("poster") or None,
+    ]
+    digest = hashlib.blake2b(json.dumps(row).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def catalog_checksum(movies):
+    """
+    Checksum (title, details) pairs independently of their order.
+
+    Args:
+        movies (Iterable[tuple]): The (title, details) pairs.
+
+    Returns:
+        tuple: The number of movies and the sum of their digests as hex.
+    """
+    count = 0
+    total = 0
+    for title, details in movies:
+        count += 1
+        total = (total + movie_digest(title, details)) & _CHECKSUM_MASK
+    return count, f"{total:016x}"
+
+
+def convert_catalog(source, destination, batch_size=1000, progress=None):
+    """
+    Copy every movie from one storage to another.
+
+    The source is streamed with iter_movies() and written to the destination
+    with add_movies() in batches of batch_size movies, inside one
+    destination.batch(), so only one batch is held in memory at a time
+    unless the destination caches the whole catalog anyway. To verify the
+    copy, compare the result with catalog_checksum() of the destination
+    opened again.
+
+    Args:
+        source (IStorage): The catalog to copy.
+        destination (IStorage): An empty catalog to copy into.
+        batch_size (int): Number of movies added at once.
+        progress (Callable): Called with the number of movies copied so far
+            after every batch, or None.
+
+    Returns:
+        dict: "read", the number of movies in the source, "copied", the
+            number added to the destination, and "checksum", the checksum of
+            the source, see catalog_checksum().
+
+    Raises:
+        ValueError: If the destination already has movies.
+    """
+    if next(iter(destination.iter_movies()), None) is not None:
+        raise ValueError("The destination already has movies; convert into a new file.")
+
+    count = 0
+    total = 0
+    copied = 0
+    movies = iter(source.iter_movies())
+    with destination.batch():
+        while batch := list(itertools.islice(movies, batch_size)):
+            rows = []
+            for title, details in batch:
+                count += 1
+                total = (total + movie_digest(title, details)) & _CHECKSUM_MASK
+                rows.append(
+                    (title, details["year"], details["rating"], details.get("poster"))
+                )
+            # The storages report every add_movies() call
+            with contextlib.redirect_stdout(io.StringIO()):
+                copied += destination.add_movies(rows)
+            if progress:
+                progress(copied)
+
+    return {"read": count, "copied": copied, "checksum": f"{total:016x}"}
@@ -0,0 +1,55 @@
+from storage.compression import split_compression
+
+SUPPORTED_EXTENSIONS = (
+    ".csv",
+    ".json",
+    ".db",
+    ".sqlite",
+    ".mdb",
+    ".csv.gz",
+    ".json.gz",
+    ".csv.xz",
+    ".json.xz",
+)
+
+
+def open_storage(file_name, journaled=False, columnar=False, streaming=False):
+    """
+    Open the storage matching the extension of the file name.
+
+    CSV and JSON files ending with .gz or .xz are compressed with gzip or
+    xz, and decompressed as they are read. Only the module of the chosen
+    storage is imported.
+
+    Args:
+        file_name (str): Name of the catalog file in the "data" directory.
+        journaled (bool): Journal changes to JSON files, see StorageJson.
+        columnar (bool): Cache CSV and JSON catalogs column by column, see
+            ColumnarCatalog. SQLite databases are not cached in memory.
+        streaming (bool): Stream CSV files instead of loading them, see
+            StreamingStorageCsv, and read JSON files one movie at a time
+            when they are iterated over.
+
+    Returns:
+        IStorage: The storage for the file.
+    """
+    base_name, _ = split_compression(file_name)
+    if base_name.endswith(".csv"):
+        from storage.storage_csv import StorageCsv, StreamingStorageCsv
+
+        if streaming:
+            return StreamingStorageCsv(file_name)
+        return StorageCsv(file_name, columnar=columnar)
+    if file_name.endswith((".db", ".sqlite")):
+        from storage.storage_sqlite import StorageSqlite
+
+        return StorageSqlite(file_name)
+    if file_name.endswith(".mdb"):
+        from storage.storage_mdb import StorageMdb
+
+        return StorageMdb(file_name)
+    from storage.storage_json import StorageJson
+
+    return StorageJson(
+        file_name, journaled=journaled, columnar=columnar, streaming=streaming
+    )
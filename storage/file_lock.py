@@ -0,0 +1,95 @@
+import functools
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where locking is skipped
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory lock on a catalog file, shared by all processes using it.
+
+    The lock is held on a "<file>.lock" sidecar, which also holds a counter
+    that every locked write bumps. A storage remembers the counter it last
+    saw, so once it holds the lock it can tell whether another process
+    changed the catalog in the meantime and its cached copy is stale.
+    Reads do not take the lock; writes replace files atomically, so readers
+    see either the old or the new catalog.
+    """
+
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path (str): Path of the catalog file to lock.
+        """
+        self._lock_path = file_path + ".lock"
+        self.version = None  # Counter seen when the catalog was last read
+        self._held = False
+
+    def read_version(self):
+        """Returns the current counter without taking the lock."""
+        try:
+            with open(self._lock_path, "r") as lock_file:
+                return int(lock_file.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Hold the lock for a read-modify-write of the catalog.
+
+        Taking the lock again while it is held, e.g. for each change of a
+        batch, does nothing; it is released and the counter bumped once the
+        outermost holder is done.
+
+        Yields:
+            bool: True if another process wrote to the catalog since the
+                counter was last seen, so cached data must be read again.
+        """
+        if self._held:
+            yield False
+            return
+
+        with open(self._lock_path, "a+") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                lock_file.seek(0)
+                try:
+                    version = int(lock_file.read() or 0)
+                except ValueError:
+                    version = 0
+                self._held = True
+                yield version != self.version
+
+                version += 1
+                lock_file.seek(0)
+                lock_file.truncate()
+                lock_file.write(str(version))
+                lock_file.flush()
+                self.version = version
+            finally:
+                self._held = False
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def locked(method):
+    """
+    Run a storage method holding the storage's FileLock (self._lock).
+
+    If another process wrote to the catalog since the storage last saw it,
+    self._invalidate() is called first to drop anything cached.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.exclusive() as changed:
+            if changed:
+                self._invalidate()
+            return method(self, *args, **kwargs)
+
+    return wrapper
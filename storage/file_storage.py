@@ -0,0 +1,285 @@
+import os
+from abc import abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+
+from storage.catalog_stats import CatalogStats
+from storage.columnar import ColumnarCatalog
+from storage.compression import split_compression
+from storage.file_lock import FileLock, locked
+from storage.istorage import IStorage
+from storage.records import parse_year
+from storage.sorted_index import SortedIndex
+
+
+class FileStorage(IStorage):
+    """
+    Base class for storages that keep the whole catalog in a single file.
+
+    The parsed catalog is cached in memory and every change is written
+    through to the file, compressed if its name ends with .gz or .xz. The
+    cache is dropped when the file's modification time or size changes,
+    e.g. because another process edited it. Writers take the file's
+    FileLock, and if its counter shows that another process wrote since the
+    cache was filled, the catalog is read again and the change applied on
+    top of it rather than on the stale copy. With columnar=True the cache
+    is a ColumnarCatalog, which takes a fraction of the memory of a dict
+    per movie.
+    """
+
+    def __init__(self, file_name, columnar=False):
+        _data = "data"  # Relative path to the "data" directory
+        self._file_path = os.path.join(_data, file_name)
+        self._compression = split_compression(file_name)[1]  # ".gz", ".xz" or None
+        self._columnar = columnar
+        self._movies = None
+        self._file_stamp = None
+        self._lock = FileLock(self._file_path)
+        self._deferred = False  # Inside batch(), the file is written at the end
+        self._dirty = False
+        self._titles = {}  # Casefolded title -> title as stored
+        self._stats = CatalogStats()
+        self._by_year = SortedIndex()
+        self._indexes_stale = False  # Bulk changes rebuild them when needed
+        self._version = 0  # Bumped whenever the cached catalog changes
+        self._io = Counter()  # Bytes read and written, cache hits and misses
+
+    @abstractmethod
+    def _read_data(self):
+        """Reads the existing movie data from the file."""
+        pass
+
+    @abstractmethod
+    def _write_data(self, movies):
+        """Writes the movie data to the file."""
+        pass
+
+    def _new_catalog(self, movies=()):
+        """Returns the movies as the catalog type this storage caches."""
+        if self._columnar:
+            return ColumnarCatalog(movies)
+        return movies if isinstance(movies, dict) else dict(movies)
+
+    def _get_file_stamp(self):
+        """Returns the (mtime, size) of the file, or None if it does not exist."""
+        try:
+            stat = os.stat(self._file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_movies(self):
+        """Returns the cached movies, re-reading the file only if it changed."""
+        stamp = self._get_file_stamp()
+        if self._movies is None or stamp != self._file_stamp:
+            # Read the counter first: a write racing the read then only
+            # causes a needless reload, never a stale cache
+            self._lock.version = self._lock.read_version()
+            self._movies = self._read_data()
+            self._file_stamp = stamp
+            self._build_indexes(self._movies)
+            self._version += 1
+            self._io["cache_misses"] += 1
+        else:
+            self._io["cache_hits"] += 1
+        return self._movies
+
+    def _invalidate(self):
+        """Drops the cached catalog after another process changed the file."""
+        self._movies = None
+
+    def _load_indexed(self):
+        """Returns the cached movies, with the rating and year indexes rebuilt."""
+        movies = self._load_movies()
+        if self._indexes_stale:
+            self._build_indexes(movies)
+        return movies
+
+    def _build_indexes(self, movies):
+        """Rebuilds the in-memory indexes after the catalog was (re)loaded."""
+        self._indexes_stale = False
+        self._titles = {title.casefold(): title for title in movies}
+        self._stats = CatalogStats(movies)
+        self._by_year = SortedIndex(
+            (parse_year(details.get("year")), title)
+            for title, details in movies.items()
+            if parse_year(details.get("year")) is not None
+        )
+
+    def _index_year(self, title, details, add):
+        """Adds a movie to or removes it from the year index."""
+        year = parse_year(details.get("year"))
+        if year is not None:
+            if add:
+                self._by_year.add(year, title)
+            else:
+                self._by_year.remove(year, title)
+
+    def _persist(self, movies, change):
+        """
+        Persists the movies after a mutation.
+
+        Args:
+            movies (dict): The complete, already updated catalog.
+            change (tuple): The mutation as ("set", title, details) or
+                ("delete", title, None), or None for a bulk rewrite.
+        """
+        self._write_data(movies)
+
+    def _save_movies(self, movies, change=None):
+        """Writes the movies through to the file and keeps them cached."""
+        if self._deferred:
+            self._movies = movies
+            self._dirty = True
+            self._version += 1
+            return
+        try:
+            self._persist(movies, change)
+        except Exception:
+            self._movies = None  # The file may not match the cache any more
+            raise
+        self._movies = movies
+        self._file_stamp = self._get_file_stamp()
+        self._version += 1
+
+    @contextmanager
+    def batch(self):
+        """Holds the lock and writes the file once, after all the changes."""
+        with self._lock.exclusive() as changed:
+            if changed:
+                self._invalidate()
+            self._deferred = True
+            try:
+                yield
+            finally:
+                self._deferred = False
+                if self._dirty:
+                    self._dirty = False
+                    self._save_movies(self._movies)
+
+    def list_movies(self):
+        """Returns the list of movies."""
+        movies = self._load_movies()
+        return movies
+
+    def catalog_version(self):
+        """Returns a counter that changes whenever the catalog changes."""
+        self._load_movies()
+        return self._version
+
+    def io_stats(self):
+        """Returns the bytes read and written and the catalog cache hits."""
+        return dict(self._io)
+
+    def find_movie(self, title):
+        """Returns the stored title and details of a movie, ignoring case."""
+        movies = self._load_movies()
+        title_in_db = self._titles.get(title.casefold())
+        if title_in_db is None:
+            return None
+        return title_in_db, movies[title_in_db]
+
+    def stats(self, percentiles=(25, 75, 90)):
+        """Returns the rating statistics kept up to date in memory."""
+        self._load_indexed()
+        return self._stats.summary(percentiles)
+
+    def movies_by_rating(self, offset=0, limit=None):
+        """Returns a page of (title, details) pairs from the rating index."""
+        movies = self._load_indexed()
+        pairs = self._stats.by_rating.descending(offset, limit)
+        return [(title, movies[title]) for _, title in pairs]
+
+    def rating_range(self, low, high):
+        """Returns the movies rated low to high from the rating index."""
+        movies = self._load_indexed()
+        pairs = self._stats.by_rating.range(low, high)
+        return [(title, movies[title]) for _, title in reversed(pairs)]
+
+    def year_range(self, low, high):
+        """Returns the movies released from low to high from the year index."""
+        movies = self._load_indexed()
+        return [(title, movies[title]) for _, title in self._by_year.range(low, high)]
+
+    @locked
+    def add_movie(self, title, year, rating, poster=None):
+        """Adds a new movie to the file."""
+        movies = self._load_indexed()
+        if title.casefold() in self._titles:
+            print(f"Movie '{title}' already exists in the database.")
+            return
+
+        movies[title] = {"year": year, "rating": rating, "poster": poster}
+        self._titles[title.casefold()] = title
+        self._stats.add(title, movies[title])
+        self._index_year(title, movies[title], add=True)
+        self._save_movies(movies, ("set", title, movies[title]))
+        print(f"Movie '{title}' added successfully.")
+
+    @locked
+    def add_movies(self, movies_to_add):
+        """Adds many movies with a single write, skipping existing titles."""
+        movies = self._load_movies()
+        added = 0
+        for title, year, rating, poster in movies_to_add:
+            if title.casefold() in self._titles:
+                continue
+            movies[title] = {"year": year, "rating": rating, "poster": poster}
+            self._titles[title.casefold()] = title
+            added += 1
+
+        if added:
+            # Rebuilt on the next query, so batches of adds rebuild them once
+            self._indexes_stale = True
+            self._save_movies(movies)
+        print(f"{added} movies added successfully.")
+        return added
+
+    @locked
+    def delete_movie(self, title):
+        """Deletes a movie by title from the file."""
+        movies = self._load_indexed()
+        title_in_db = self._titles.pop(title.casefold(), None)
+        if title_in_db is None:
+            print(f"Movie '{title}' not found in the database.")
+            return
+
+        details = movies.pop(title_in_db)
+        self._stats.remove(title_in_db, details)
+        self._index_year(title_in_db, details, add=False)
+        self._save_movies(movies, ("delete", title_in_db, None))
+        print(f"Movie '{title}' deleted successfully.")
+
+    @locked
+    def update_movie(self, title, rating):
+        """Updates the rating of an existing movie."""
+        movies = self._load_indexed()
+        title_in_db = self._titles.get(title.casefold())
+        if title_in_db is None:
+            print(f"Movie '{title}' not found in the database.")
+            return
+
+        self._stats.remove(title_in_db, movies[title_in_db])
+        movies[title_in_db] = {**movies[title_in_db], "rating": rating}
+        self._stats.add(title_in_db, movies[title_in_db])
+        self._save_movies(movies, ("set", title_in_db, movies[title_in_db]))
+        print(f"Movie '{title_in_db}' rating updated to {rating}.")
+
+    @locked
+    def update_movies(self, ratings):
+        """Updates the ratings of many movies with a single write."""
+        movies = self._load_movies()
+        updated = 0
+        for title, rating in ratings.items():
+            title_in_db = self._titles.get(title.casefold())
+            if title_in_db is None:
+                continue
+            movies[title_in_db] = {**movies[title_in_db], "rating": rating}
+            updated += 1
+
+        if updated:
+            # Rebuilt on the next query, like after add_movies()
+            self._indexes_stale = True
+            self._save_movies(movies)
+        print(f"{updated} movie ratings updated.")
+        return updated
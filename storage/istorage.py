@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+
+from storage.catalog_stats import CatalogStats
+from storage.records import parse_rating, parse_year
 
 
 class IStorage(ABC):
@@ -7,11 +11,28 @@ class IStorage(ABC):
         """Return the strings to print the movies in a storage."""
         pass
 
+    def iter_movies(self):
+        """Return an iterator over the (title, details) pairs of the movies."""
+        return iter(self.list_movies().items())
+
+    def count(self):
+        """Return the number of movies."""
+        return len(self.list_movies())
+
     @abstractmethod
     def add_movie(self, title, year, rating, poster):
         """Add the movie with given input to the storage."""
         pass
 
+    def add_movies(self, movies):
+        """Add many (title, year, rating, poster) rows, return how many were new."""
+        added = 0
+        for title, year, rating, poster in movies:
+            if self.find_movie(title) is None:
+                self.add_movie(title, year, rating, poster)
+                added += 1
+        return added
+
     @abstractmethod
     def delete_movie(self, title):
         """Delete given movie from the storage."""
@@ -21,3 +42,70 @@ class IStorage(ABC):
     def update_movie(self, title, rating):
         """Update the movie ratings for the given movie."""
         pass
+
+    def update_movies(self, ratings):
+        """Update the ratings of many {title: rating} movies, return the count."""
+        updated = 0
+        for title, rating in ratings.items():
+            if self.find_movie(title) is not None:
+                self.update_movie(title, rating)
+                updated += 1
+        return updated
+
+    def batch(self):
+        """Return a context manager grouping many changes; by default a no-op."""
+        return nullcontext()
+
+    def catalog_version(self):
+        """Return a value that changes with the catalog, or None if unknown."""
+        return None
+
+    def io_stats(self):
+        """Return counters of the file I/O, e.g. {"bytes_read": 1024}."""
+        return {}
+
+    def find_movie(self, title):
+        """Return (title, details) of the movie ignoring case, or None."""
+        for title_in_db, details in self.list_movies().items():
+            if title_in_db.casefold() == title.casefold():
+                return title_in_db, details
+        return None
+
+    def stats(self, percentiles=(25, 75, 90)):
+        """Return the rating statistics, see CatalogStats.summary()."""
+        return CatalogStats(self.list_movies()).summary(percentiles)
+
+    def movies_by_rating(self, offset=0, limit=None):
+        """Return a page of (title, details) pairs, best rated first."""
+        rated = []
+        for title, details in self.list_movies().items():
+            rating = parse_rating(details.get("rating"))
+            if rating is not None:
+                rated.append((rating, title, details))
+        rated.sort(key=lambda movie: movie[:2], reverse=True)
+        end = None if limit is None else offset + limit
+        return [(title, details) for _, title, details in rated[offset:end]]
+
+    def top_k(self, n):
+        """Return the n best rated (title, details) pairs, best first."""
+        return self.movies_by_rating(0, n)
+
+    def rating_range(self, low, high):
+        """Return the (title, details) pairs rated low to high, best first."""
+        rated = []
+        for title, details in self.list_movies().items():
+            rating = parse_rating(details.get("rating"))
+            if rating is not None and low <= rating <= high:
+                rated.append((rating, title, details))
+        rated.sort(key=lambda movie: movie[:2], reverse=True)
+        return [(title, details) for _, title, details in rated]
+
+    def year_range(self, low, high):
+        """Return the (title, details) pairs released low to high, oldest first."""
+        released = []
+        for title, details in self.list_movies().items():
+            year = parse_year(details.get("year"))
+            if year is not None and low <= year <= high:
+                released.append((year, title, details))
+        released.sort(key=lambda movie: movie[:2])
+        return [(title, details) for _, title, details in released]
@@ -0,0 +1,38 @@
+import re
+
+_YEAR_PATTERN = re.compile(r"\d{4}")
+
+
+def parse_year(value):
+    """
+    Convert a stored or OMDb year to an int.
+
+    OMDb returns strings such as "1984" or "2010–2015" for series, and older
+    catalogs store the year as a string, so take the first four digits.
+
+    Args:
+        value (int | str | None): The year as stored.
+
+    Returns:
+        int | None: The year, or None if it cannot be parsed.
+    """
+    if isinstance(value, int):
+        return value
+    match = _YEAR_PATTERN.search(str(value)) if value is not None else None
+    return int(match.group()) if match else None
+
+
+def parse_rating(value):
+    """
+    Convert a stored or OMDb rating to a float.
+
+    Args:
+        value (float | str | None): The rating as stored, e.g. 8.1 or "N/A".
+
+    Returns:
+        float | None: The rating, or None if it cannot be parsed.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
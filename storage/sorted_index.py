@@ -0,0 +1,53 @@
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+
+_key = itemgetter(0)
+
+
+class SortedIndex:
+    """
+    (key, title) pairs kept sorted by key, then title.
+
+    Backs ordered listings and range queries: bounds are found by binary
+    search and pages are slices, so a query costs O(log N + k) for k results
+    instead of sorting the whole catalog.
+    """
+
+    def __init__(self, pairs=()):
+        """
+        Args:
+            pairs (Iterable[tuple]): The (key, title) pairs to start with.
+        """
+        self._pairs = sorted(pairs)
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def __getitem__(self, index):
+        return self._pairs[index]
+
+    def __iter__(self):
+        return iter(self._pairs)
+
+    def __reversed__(self):
+        return reversed(self._pairs)
+
+    def add(self, key, title):
+        """Adds a title under the given key."""
+        insort(self._pairs, (key, title))
+
+    def remove(self, key, title):
+        """Removes a title that was added under the given key."""
+        del self._pairs[bisect_left(self._pairs, (key, title))]
+
+    def range(self, low, high):
+        """Returns the (key, title) pairs with low <= key <= high, ascending."""
+        start = bisect_left(self._pairs, low, key=_key)
+        end = bisect_right(self._pairs, high, key=_key)
+        return self._pairs[start:end]
+
+    def descending(self, offset=0, limit=None):
+        """Returns a page of (key, title) pairs, highest key first."""
+        end = len(self._pairs) - offset
+        start = 0 if limit is None else max(end - limit, 0)
+        return self._pairs[start : max(end, 0)][::-1]
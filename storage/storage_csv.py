@@ -1,93 +1,308 @@
 import csv
+import heapq
 import os
+from collections.abc import ItemsView, Mapping
+from contextlib import contextmanager
 
+from storage.compression import open_reader, open_writer, split_compression
+from storage.file_lock import FileLock, locked
+from storage.file_storage import FileStorage
 from storage.istorage import IStorage
+from storage.records import parse_rating, parse_year
 
+_FIELDNAMES = ["title", "year", "rating", "poster"]
 
-class StorageCsv(IStorage):
 
-    def __init__(self, file_name):
-        _data = "data"  # Relative path to the "data" directory
-        self._file_path = os.path.join(_data, file_name)
+class StorageCsv(FileStorage):
 
     def _read_data(self):
         """Reads the existing movie data from the CSV file."""
-        movies = {}
+        movies = self._new_catalog()
         try:
-            with open(self._file_path, mode="r", newline="") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    title = row["title"]
-                    movies[title] = {
-                        "year": int(row["year"]),
-                        "rating": float(row["rating"]),
-                        "poster": row["poster"],  # Optional field, can be empty
-                    }
+            with open_reader(self._file_path, self._compression, newline="") as file:
+                self._io["bytes_read"] += os.fstat(file.fileno()).st_size
+                for title, details in _read_rows(file):
+                    movies[title] = details
         except FileNotFoundError:
-            movies = {}  # Initialize with an empty dictionary if file not found
+            movies = self._new_catalog()  # Start empty if file not found
         return movies
 
     def _write_data(self, movies):
         """Writes the movie data to the CSV file."""
-        with open(self._file_path, mode="w", newline="") as file:
-            fieldnames = ["title", "year", "rating", "poster"]
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            for title, details in movies.items():
-                writer.writerow(
-                    {
-                        "title": title,
-                        "year": details["year"],
-                        "rating": details["rating"],
-                        "poster": details.get("poster", ""),
-                    }
-                )
+        temp_path = f"{self._file_path}.{os.getpid()}.tmp"
+        with open_writer(temp_path, "w", self._compression, newline="") as file:
+            _write_rows(file, movies.items())
+        self._io["bytes_written"] += os.path.getsize(temp_path)
+        os.replace(temp_path, self._file_path)
+
+
+class StreamingStorageCsv(IStorage):
+    """
+    CSV storage that streams the file instead of loading it.
+
+    Reading and searching walk the rows one at a time, new movies are
+    appended, and updates and deletes copy the rows to a temporary file that
+    then atomically replaces the original. Memory use does not grow with the
+    size of the file, at the cost of a pass over the file per operation.
+    As nothing is cached, every change reads the rows on disk while holding
+    the file's FileLock, so a movie another session just wrote is kept.
+    batch() holds the lock throughout and keeps only the titles in memory,
+    so adding many batches of movies reads the file once.
+    """
+
+    def __init__(self, file_name):
+        _data = "data"  # Relative path to the "data" directory
+        self._file_path = os.path.join(_data, file_name)
+        self._compression = split_compression(file_name)[1]  # ".gz", ".xz" or None
+        self._lock = FileLock(self._file_path)
+        self._known = None  # Casefolded titles, kept inside batch()
+
+    def _invalidate(self):
+        """Nothing is cached, so changes by other processes need no action."""
+
+    @contextmanager
+    def batch(self):
+        """Holds the lock and keeps the titles, so adds skip re-reading the file."""
+        with self._lock.exclusive():
+            self._known = {title.casefold() for title, _ in self.iter_movies()}
+            try:
+                yield
+            finally:
+                self._known = None
+
+    def iter_movies(self):
+        """Yields (title, details) pairs, reading the file row by row."""
+        try:
+            with open_reader(self._file_path, self._compression, newline="") as file:
+                yield from _read_rows(file)
+        except FileNotFoundError:
+            return
 
     def list_movies(self):
-        """Returns the list of movies."""
-        movies = self._read_data()
-        return movies
+        """Returns a read-only view of the movies that streams the file."""
+        return _StreamingView(self)
+
+    def find_movie(self, title):
+        """Returns the stored title and details of a movie, ignoring case."""
+        key = title.casefold()
+        for title_in_db, details in self.iter_movies():
+            if title_in_db.casefold() == key:
+                return title_in_db, details
+        return None
+
+    def _rated_movies(self, low=None, high=None):
+        """Yields (rating, title, details) of the rated movies, in one pass."""
+        for title, details in self.iter_movies():
+            rating = details["rating"]
+            if rating is None:
+                continue
+            if low is None or low <= rating <= high:
+                yield rating, title, details
+
+    def movies_by_rating(self, offset=0, limit=None):
+        """Returns a page of (title, details) pairs, best rated first."""
+
+        def key(movie):
+            return movie[:2]
+
+        if limit is None:
+            rated = sorted(self._rated_movies(), key=key, reverse=True)[offset:]
+        else:
+            # Only the movies up to the end of the page are kept in memory
+            rated = heapq.nlargest(offset + limit, self._rated_movies(), key=key)
+            rated = rated[offset:]
+        return [(title, details) for _, title, details in rated]
+
+    def rating_range(self, low, high):
+        """Returns the movies rated low to high, best first, in one pass."""
+        rated = sorted(
+            self._rated_movies(low, high), key=lambda movie: movie[:2], reverse=True
+        )
+        return [(title, details) for _, title, details in rated]
+
+    def year_range(self, low, high):
+        """Returns the movies released low to high, oldest first, in one pass."""
+        released = sorted(
+            (
+                (details["year"], title, details)
+                for title, details in self.iter_movies()
+                if details["year"] is not None and low <= details["year"] <= high
+            ),
+            key=lambda movie: movie[:2],
+        )
+        return [(title, details) for _, title, details in released]
+
+    def _append(self, rows):
+        """Appends (title, details) rows, writing the header to a new file."""
+        new_file = not os.path.exists(self._file_path)
+        with open_writer(self._file_path, "a", self._compression, newline="") as file:
+            _write_rows(file, rows, header=new_file)
+
+    def _rewrite(self, change):
+        """
+        Streams the rows through change() into a new file and swaps it in.
+
+        Args:
+            change (Callable): Maps a (title, details) row to its new details,
+                or to None to drop the row.
 
+        Returns:
+            list: The titles of the rows that were changed or dropped.
+        """
+        changed = []
+
+        def rows():
+            for title, details in self.iter_movies():
+                new_details = change(title, details)
+                if new_details is not details:
+                    changed.append(title)
+                if new_details is not None:
+                    yield title, new_details
+
+        temp_path = f"{self._file_path}.{os.getpid()}.tmp"
+        with open_writer(temp_path, "w", self._compression, newline="") as file:
+            _write_rows(file, rows())
+        if changed:
+            os.replace(temp_path, self._file_path)
+        else:
+            os.remove(temp_path)
+        return changed
+
+    @locked
     def add_movie(self, title, year, rating, poster=None):
-        """Adds a new movie to the CSV file."""
-        movies = self._read_data()
-        if title in movies:
+        """Appends a new movie to the CSV file."""
+        if self._known is not None:
+            exists = title.casefold() in self._known
+        else:
+            exists = self.find_movie(title) is not None
+        if exists:
             print(f"Movie '{title}' already exists in the database.")
             return
 
-        # Add new movie details
-        movies[title] = {
-            "year": year,
-            "rating": rating,
-            "poster": poster,  # Optional field for poster
-        }
-
-        self._write_data(movies)
+        self._append([(title, {"year": year, "rating": rating, "poster": poster})])
+        if self._known is not None:
+            self._known.add(title.casefold())
         print(f"Movie '{title}' added successfully.")
 
+    @locked
+    def add_movies(self, movies_to_add):
+        """Appends many movies in one write, skipping existing titles."""
+        known = self._known
+        if known is None:
+            known = {title.casefold() for title, _ in self.iter_movies()}
+        rows = []
+        for title, year, rating, poster in movies_to_add:
+            if title.casefold() in known:
+                continue
+            known.add(title.casefold())
+            rows.append((title, {"year": year, "rating": rating, "poster": poster}))
+
+        if rows:
+            self._append(rows)
+        print(f"{len(rows)} movies added successfully.")
+        return len(rows)
+
+    @locked
     def delete_movie(self, title):
-        """Deletes a movie by title from the CSV file."""
-        movies = self._read_data()
-        if title.lower() in (key.lower() for key in movies.keys()):
-            lowercase_movies = {key.lower(): key for key in movies}
-            title_in_db = lowercase_movies.get(title.lower())
-            del movies[title_in_db]
+        """Deletes a movie by title, copying the other rows to a new file."""
+        key = title.casefold()
+        deleted = self._rewrite(
+            lambda title_in_db, details: (
+                None if title_in_db.casefold() == key else details
+            )
+        )
+        if deleted:
+            if self._known is not None:
+                self._known.discard(key)
             print(f"Movie '{title}' deleted successfully.")
         else:
             print(f"Movie '{title}' not found in the database.")
 
+    @locked
     def update_movie(self, title, rating):
         """Updates the rating of an existing movie."""
-        movies = self._read_data()
-        if title.lower() in [movie.lower() for movie in movies.keys()]:
-            lowercase_movies = {key.lower(): key for key in movies}
-            matched_title = lowercase_movies.get(title.lower())
-            movies[matched_title]["rating"] = rating
-            self._write_data(movies)
-            print(f"Movie '{matched_title}' rating updated to {rating}.")
+        updated = self._rewrite_ratings({title.casefold(): rating})
+        if updated:
+            print(f"Movie '{updated[0]}' rating updated to {rating}.")
         else:
             print(f"Movie '{title}' not found in the database.")
 
+    @locked
+    def update_movies(self, ratings):
+        """Updates the ratings of many movies in one pass over the file."""
+        updated = self._rewrite_ratings(
+            {title.casefold(): rating for title, rating in ratings.items()}
+        )
+        print(f"{len(updated)} movie ratings updated.")
+        return len(updated)
+
+    def _rewrite_ratings(self, ratings):
+        """Rewrites the file with new {casefolded title: rating} ratings."""
+
+        def change(title, details):
+            key = title.casefold()
+            if key not in ratings:
+                return details
+            return {**details, "rating": ratings[key]}
+
+        return self._rewrite(change)
+
+
+class _StreamingView(Mapping):
+    """{title: details} view of a CSV file that reads it on every access."""
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __len__(self):
+        return sum(1 for _ in self._storage.iter_movies())
+
+    def __iter__(self):
+        return (title for title, _ in self._storage.iter_movies())
+
+    def __getitem__(self, title):
+        for title_in_db, details in self._storage.iter_movies():
+            if title_in_db == title:
+                return details
+        raise KeyError(title)
+
+    def items(self):
+        return _StreamingItems(self)
+
+
+class _StreamingItems(ItemsView):
+    """Items of a _StreamingView, read in one pass instead of a scan each."""
+
+    def __iter__(self):
+        return self._mapping._storage.iter_movies()
+
+
+def _read_rows(file):
+    """Yields (title, details) pairs from an open CSV file."""
+    for row in csv.DictReader(file):
+        yield row["title"], {
+            # Unknown years and ratings are written as ""
+            "year": parse_year(row["year"]),
+            "rating": parse_rating(row["rating"]),
+            "poster": row["poster"],  # Optional field, can be empty
+        }
+
+
+def _write_rows(file, rows, header=True):
+    """Writes (title, details) pairs to an open CSV file."""
+    writer = csv.DictWriter(file, fieldnames=_FIELDNAMES)
+    if header:
+        writer.writeheader()
+    for title, details in rows:
+        writer.writerow(
+            {
+                "title": title,
+                "year": details["year"],
+                "rating": details["rating"],
+                "poster": details.get("poster", ""),
+            }
+        )
+
 
 # Sanity check
 
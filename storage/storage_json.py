@@ -1,71 +1,194 @@
 import json
 import os
-
-from storage.istorage import IStorage
-
-
-class StorageJson(IStorage):
-
-    def __init__(self, file_name):
-        _data = "data"  # Relative path to the "data" directory
-        self._file_path = os.path.join(_data, file_name)
+import re
+
+from storage.compression import open_reader, open_writer
+from storage.file_lock import locked
+from storage.file_storage import FileStorage
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class StorageJson(FileStorage):
+    # Compact the journal into the snapshot once it grows past this size
+    JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+    def __init__(self, file_name, journaled=False, columnar=False, streaming=False):
+        """
+        Args:
+            file_name (str): Name of the JSON file in the "data" directory.
+            journaled (bool): Append single-movie changes to a sidecar
+                journal instead of rewriting the whole file every time.
+            columnar (bool): Cache the catalog as a ColumnarCatalog.
+            streaming (bool): Make iter_movies() read the file one movie at
+                a time instead of loading it, unless it is already cached.
+        """
+        super().__init__(file_name, columnar=columnar)
+        self._journaled = journaled
+        self._streaming = streaming
+        self._journal_path = self._file_path + ".journal"
+        self._journal_torn = False
+
+    def _get_file_stamp(self):
+        """Returns the stamps of both the snapshot and the journal."""
+        snapshot_stamp = super()._get_file_stamp()
+        try:
+            stat = os.stat(self._journal_path)
+        except FileNotFoundError:
+            return snapshot_stamp, None
+        return snapshot_stamp, (stat.st_mtime_ns, stat.st_size)
 
     def _read_data(self):
         """Reads the existing movie data from the file."""
-        movies = {}
         try:
-            with open(self._file_path, "r") as file:
-                movies = json.load(file)
+            with open_reader(self._file_path, self._compression) as file:
+                movies = self._new_catalog(json.load(file))
+                self._io["bytes_read"] += os.fstat(file.fileno()).st_size
         except FileNotFoundError:
-            movies = {}  # Initialize with an empty dictionary if file not found
+            movies = self._new_catalog()  # Start empty if file not found
+        self._replay_journal(movies)
         return movies
 
-    def _write_data(self, movies):
-        """Writes the movie data to the file."""
-        with open(self._file_path, "w") as file:
-            json.dump(movies, file, indent=4)
+    def iter_movies(self):
+        """Returns the (title, details) pairs, streamed from the file if asked to."""
+        if (
+            not self._streaming
+            or self._movies is not None
+            or os.path.exists(self._journal_path)
+        ):
+            # The journal can change any movie, so it needs the whole catalog
+            yield from super().iter_movies()
+            return
+        try:
+            file = open_reader(self._file_path, self._compression)
+        except FileNotFoundError:
+            return
+        with file:
+            yield from _JsonObjectReader(file)
 
-    def list_movies(self):
-        """Returns the list of movies."""
-        movies = self._read_data()
-        return movies
+    def _replay_journal(self, movies):
+        """Applies the changes recorded in the journal on top of the snapshot."""
+        try:
+            with open(self._journal_path, "r") as journal:
+                self._io["bytes_read"] += os.fstat(journal.fileno()).st_size
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line from an interrupted append
+                        self._journal_torn = True
+                        break
+                    if entry["op"] == "set":
+                        movies[entry["title"]] = entry["details"]
+                    elif entry["op"] == "delete":
+                        movies.pop(entry["title"], None)
+        except FileNotFoundError:
+            pass
 
-    def add_movie(self, title, year, rating, poster=None):
-        """Adds a new movie to the JSON file."""
-        movies = self._read_data()  # Read the current movies data
-        if title in movies.keys():
-            print(f"Movie '{title}' already exists in the database.")
-            return  # no further actions required
-        else:
-            # Add new movie details
-            movies[title] = {"year": year, "rating": rating, "poster": poster}
-
-        self._write_data(movies)  # Write updated movies data back to the file
-        print(f"Movie '{title}' added successfully.")
-
-    def delete_movie(self, title):
-        """Deletes a movie by title from the JSON file."""
-        movies = self._read_data()
-        if title.lower() in (key.lower() for key in movies.keys()):
-            lowercase_movies = {key.lower(): key for key in movies}
-            title_in_db = lowercase_movies.get(title.lower())
-            del movies[title_in_db]
+    def _write_data(self, movies):
+        """Writes the movie data to the file."""
+        temp_path = f"{self._file_path}.{os.getpid()}.tmp"
+        with open_writer(temp_path, "w", self._compression) as file:
+            # Compact, without indentation; default=dict serializes a
+            # ColumnarCatalog like a plain dict
+            json.dump(movies, file, separators=(",", ":"), default=dict)
+        self._io["bytes_written"] += os.path.getsize(temp_path)
+        # Swap the new snapshot in atomically, then drop the replayed journal
+        os.replace(temp_path, self._file_path)
+        if os.path.exists(self._journal_path):
+            os.remove(self._journal_path)
+        self._journal_torn = False
+
+    def _persist(self, movies, change):
+        """Appends the change to the journal, compacting it when it gets big."""
+        if not self._journaled or change is None or self._journal_torn:
             self._write_data(movies)
-            print(f"Movie '{title}' deleted successfully.")
-        else:
-            print(f"Movie '{title}' not found in the database.")
-
-    def update_movie(self, title, rating):
-        """Updates the rating of an existing movie."""
-        movies = self._read_data()
-        if title.lower() in [movie.lower() for movie in movies.keys()]:
-            lowercase_movies = {key.lower(): key for key in movies}
-            matched_title = lowercase_movies.get(title.lower())
-            movies[matched_title]["rating"] = rating
+            return
+
+        op, title, details = change
+        entry = {"op": op, "title": title}
+        if op == "set":
+            entry["details"] = details
+        line = json.dumps(entry) + "\n"
+        with open(self._journal_path, "a") as journal:
+            journal.write(line)
+            journal.flush()
+            os.fsync(journal.fileno())
+        self._io["bytes_written"] += len(line.encode())
+
+        if os.path.getsize(self._journal_path) > self.JOURNAL_COMPACT_BYTES:
             self._write_data(movies)
-            print(f"Movie '{matched_title}' rating updated to {rating}.")
-        else:
-            print(f"Movie '{title}' not found in the database.")
+
+    @locked
+    def compact(self):
+        """Folds the journal into a fresh snapshot of the JSON file."""
+        movies = self._load_movies()
+        self._write_data(movies)
+        self._file_stamp = self._get_file_stamp()
+
+
+class _JsonObjectReader:
+    """Reads the members of the top-level JSON object of a file one at a time."""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file):
+        self._file = file
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+
+    def _read_more(self):
+        """Appends the next chunk of the file to the buffer, False at the end."""
+        chunk = self._file.read(self.CHUNK_SIZE)
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return bool(chunk)
+
+    def _peek(self):
+        """Skips whitespace and returns the next character, "" at the end."""
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_more():
+                return ""
+
+    def _expect(self, characters):
+        """Consumes the next character, which must be one of the given ones."""
+        character = self._peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of {characters!r} in the JSON catalog.")
+        self._position += 1
+        return character
+
+    def _value(self):
+        """Decodes the next JSON value, reading until all of it is buffered."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read_more():
+                    raise
+                continue
+            # A number at the end of the buffer may go on in the next chunk
+            if end < len(self._buffer) or not self._read_more():
+                self._position = end
+                return value
+
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            title = self._value()
+            if not isinstance(title, str):
+                raise ValueError("Expected a title in the JSON catalog.")
+            self._expect(":")
+            yield title, self._value()
+            if self._expect(",}") == "}":
+                return
 
 
 # Sanity check
@@ -0,0 +1,322 @@
+import math
+import mmap
+import os
+import struct
+from collections.abc import ItemsView, Mapping
+from contextlib import contextmanager
+
+from storage.file_lock import FileLock, locked
+from storage.istorage import IStorage
+from storage.records import parse_rating, parse_year
+
+# File layout, all integers little-endian:
+#   header     magic, format version, number of movies
+#   order      one uint32 record offset per movie, in insertion order
+#   directory  one uint32 record offset per movie, sorted by casefolded title
+#   records    title length, poster length, year, rating, title, poster
+_MAGIC = b"MDB1"
+_HEADER = struct.Struct("<4sII")
+_OFFSET = struct.Struct("<I")
+_RECORD = struct.Struct("<HHHd")
+_VERSION = 1
+_NO_POSTER = 0xFFFF  # Poster length marking a poster of None
+
+
+class _MovieView(Mapping):
+    """
+    Read-only {title: details} view of a mapped catalog file.
+
+    Nothing is decoded up front: iterating decodes the records in file
+    order, and looking a title up binary searches the title directory.
+    """
+
+    def __init__(self, data, count):
+        self._data = data
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self._title_at(self._offset(_HEADER.size, position))
+
+    def __getitem__(self, title):
+        found = self.find(title)
+        if found is None or found[0] != title:
+            raise KeyError(title)
+        return found[1]
+
+    def items(self):
+        return _MovieItems(self)
+
+    def iter_items(self):
+        """Yields (title, details) pairs in insertion order."""
+        for position in range(self._count):
+            yield self._record(self._offset(_HEADER.size, position))
+
+    def find(self, title):
+        """Returns (title, details) of a movie ignoring case, or None."""
+        key = title.casefold()
+        directory = _HEADER.size + self._count * _OFFSET.size
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._title_at(self._offset(directory, middle)).casefold() < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            record = self._offset(directory, low)
+            if self._title_at(record).casefold() == key:
+                return self._record(record)
+        return None
+
+    def _offset(self, table, position):
+        """Returns the record offset at a position of the order or directory."""
+        return _OFFSET.unpack_from(self._data, table + position * _OFFSET.size)[0]
+
+    def _title_at(self, record):
+        """Decodes only the title of a record."""
+        title_length = _RECORD.unpack_from(self._data, record)[0]
+        start = record + _RECORD.size
+        return str(self._data[start : start + title_length], "utf-8")
+
+    def _record(self, record):
+        """Decodes a record into (title, details)."""
+        title_length, poster_length, year, rating = _RECORD.unpack_from(
+            self._data, record
+        )
+        start = record + _RECORD.size
+        title = str(self._data[start : start + title_length], "utf-8")
+        poster = None
+        if poster_length != _NO_POSTER:
+            start += title_length
+            poster = str(self._data[start : start + poster_length], "utf-8")
+        return title, {
+            "year": year or None,
+            "rating": None if math.isnan(rating) else rating,
+            "poster": poster,
+        }
+
+
+class _MovieItems(ItemsView):
+    """Items of a _MovieView, decoded in one pass instead of a lookup each."""
+
+    def __iter__(self):
+        return self._mapping.iter_items()
+
+
+class StorageMdb(IStorage):
+    """
+    Storage in a binary file that is memory-mapped and decoded lazily.
+
+    Opening a catalog only reads its header, listing it decodes the records
+    as they are iterated and finding a title binary searches a directory
+    sorted by title, so only the pages of the file that are needed are read
+    from disk. Every change rewrites the file and swaps it in atomically,
+    so this suits large catalogs that are read much more often than changed;
+    add many movies with add_movies() to rewrite it once, or inside batch(),
+    which rewrites it once at the end. Each rewrite holds the file's
+    FileLock and maps the file again first if another process replaced it,
+    so the new file is built from the latest records; batch() keeps the
+    lock until its rewrite is done.
+    """
+
+    def __init__(self, file_name):
+        _data = "data"  # Relative path to the "data" directory
+        self._file_path = os.path.join(_data, file_name)
+        self._view = None
+        self._file_stamp = None
+        self._lock = FileLock(self._file_path)
+        self._pending = None  # Casefolded title -> movie, added inside batch()
+
+    def _invalidate(self):
+        """Drops the mapped view after another process replaced the file."""
+        self._view = None
+
+    def _get_file_stamp(self):
+        """Returns the (mtime, size, inode) of the file, or None if missing."""
+        try:
+            stat = os.stat(self._file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _open(self):
+        """Returns the view of the file, mapping it again if it changed."""
+        stamp = self._get_file_stamp()
+        if self._view is None or stamp != self._file_stamp:
+            self._view = _MovieView(b"", 0)
+            if stamp is not None and stamp[1]:
+                with open(self._file_path, "rb") as file:
+                    # The mapping stays valid after the file is closed or
+                    # replaced, so views handed out earlier keep working
+                    data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, count = _HEADER.unpack_from(data)
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError(f"{self._file_path} is not a movie database.")
+                self._view = _MovieView(data, count)
+            self._file_stamp = stamp
+        return self._view
+
+    def _write(self, movies):
+        """Writes (title, details) pairs to a new file and swaps it in."""
+        records = []
+        for title, details in movies:
+            encoded_title = title.encode("utf-8")
+            poster = details.get("poster")
+            encoded_poster = b"" if poster is None else poster.encode("utf-8")
+            rating = parse_rating(details.get("rating"))
+            records.append(
+                (
+                    title.casefold(),
+                    _RECORD.pack(
+                        len(encoded_title),
+                        _NO_POSTER if poster is None else len(encoded_poster),
+                        parse_year(details.get("year")) or 0,
+                        math.nan if rating is None else rating,
+                    )
+                    + encoded_title
+                    + encoded_poster,
+                )
+            )
+
+        offsets = []
+        offset = _HEADER.size + 2 * len(records) * _OFFSET.size
+        for _, record in records:
+            offsets.append(offset)
+            offset += len(record)
+        directory = sorted(range(len(records)), key=lambda index: records[index][0])
+
+        temp_path = f"{self._file_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(records)))
+            file.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+            file.write(b"".join(_OFFSET.pack(offsets[index]) for index in directory))
+            for _, record in records:
+                file.write(record)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self._file_path)
+
+    def _flush_pending(self):
+        """Writes the movies added so far inside batch() with one rewrite."""
+        if self._pending:
+            self._write([*self._open().iter_items(), *self._pending.values()])
+            self._pending = {}
+
+    @contextmanager
+    def batch(self):
+        """Holds the lock and writes the movies added in it at the end."""
+        with self._lock.exclusive() as changed:
+            if changed:
+                self._invalidate()
+            self._pending = {}
+            try:
+                yield
+            finally:
+                try:
+                    self._flush_pending()
+                finally:
+                    self._pending = None
+
+    def list_movies(self):
+        """Returns a lazy, read-only view of the movies."""
+        return self._open()
+
+    def catalog_version(self):
+        """Returns the stamp of the file, which changes with every rewrite."""
+        return self._get_file_stamp()
+
+    def find_movie(self, title):
+        """Returns the stored title and details of a movie, ignoring case."""
+        if self._pending and title.casefold() in self._pending:
+            return self._pending[title.casefold()]
+        return self._open().find(title)
+
+    @locked
+    def add_movie(self, title, year, rating, poster=None):
+        """Adds a new movie to the file."""
+        if self._add_movies([(title, year, rating, poster)]):
+            print(f"Movie '{title}' added successfully.")
+        else:
+            print(f"Movie '{title}' already exists in the database.")
+
+    @locked
+    def add_movies(self, movies_to_add):
+        """Adds many movies with a single rewrite, skipping existing titles."""
+        added = self._add_movies(movies_to_add)
+        print(f"{added} movies added successfully.")
+        return added
+
+    def _add_movies(self, movies_to_add):
+        """Adds the new movies with a single rewrite and returns their count."""
+        view = self._open()
+        # Inside batch() the movies are only written at its end
+        new_movies = {} if self._pending is None else self._pending
+        added = 0
+        for title, year, rating, poster in movies_to_add:
+            if title.casefold() in new_movies or view.find(title) is not None:
+                continue
+            new_movies[title.casefold()] = (
+                title,
+                {"year": year, "rating": rating, "poster": poster},
+            )
+            added += 1
+
+        if added and self._pending is None:
+            self._write([*view.iter_items(), *new_movies.values()])
+        return added
+
+    @locked
+    def delete_movie(self, title):
+        """Deletes a movie by title from the file."""
+        self._flush_pending()
+        view = self._open()
+        found = view.find(title)
+        if found is None:
+            print(f"Movie '{title}' not found in the database.")
+            return
+
+        self._write(pair for pair in view.iter_items() if pair[0] != found[0])
+        print(f"Movie '{title}' deleted successfully.")
+
+    @locked
+    def update_movie(self, title, rating):
+        """Updates the rating of an existing movie."""
+        found = self.find_movie(title)
+        if found is None:
+            print(f"Movie '{title}' not found in the database.")
+            return
+
+        self._update_movies({found[0]: rating})
+        print(f"Movie '{found[0]}' rating updated to {rating}.")
+
+    @locked
+    def update_movies(self, ratings):
+        """Updates the ratings of many movies with a single rewrite."""
+        updated = self._update_movies(ratings)
+        print(f"{updated} movie ratings updated.")
+        return updated
+
+    def _update_movies(self, ratings):
+        """Updates the ratings with a single rewrite and returns the count."""
+        self._flush_pending()
+        view = self._open()
+        new_ratings = {}
+        for title, rating in ratings.items():
+            found = view.find(title)
+            if found is not None:
+                new_ratings[found[0]] = rating
+
+        if new_ratings:
+            self._write(
+                (
+                    (title, {**details, "rating": new_ratings[title]})
+                    if title in new_ratings
+                    else (title, details)
+                )
+                for title, details in view.iter_items()
+            )
+        return len(new_ratings)
@@ -0,0 +1,287 @@
+import os
+import sqlite3
+
+from storage.istorage import IStorage
+from storage.records import parse_rating, parse_year
+
+# title_key is the casefolded title: COLLATE NOCASE only folds ASCII letters
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    title_key TEXT,
+    year INTEGER,
+    rating REAL,
+    poster TEXT
+);
+"""
+
+_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_movies_title_key ON movies (title_key);
+DROP INDEX IF EXISTS idx_movies_year;
+DROP INDEX IF EXISTS idx_movies_rating;
+CREATE INDEX IF NOT EXISTS idx_movies_year_title ON movies (year, title);
+CREATE INDEX IF NOT EXISTS idx_movies_rating_title ON movies (rating, title);
+"""
+
+
+class StorageSqlite(IStorage):
+    """
+    Storage backed by an SQLite database.
+
+    Titles are unique regardless of case, compared casefolded like the file
+    storages do, and indexed, as are years and ratings, so single-movie
+    operations do not scale with the catalog size. The year and rating
+    indexes include the title, which orders ties the way the other storages
+    do. Several CLI sessions can share one file; SQLite's locking serializes
+    their writes.
+    """
+
+    # Seconds to wait for another session's write lock before giving up
+    BUSY_TIMEOUT = 30
+
+    def __init__(self, file_name):
+        _data = "data"  # Relative path to the "data" directory
+        self._file_path = os.path.join(_data, file_name)
+        self._connection = sqlite3.connect(self._file_path, timeout=self.BUSY_TIMEOUT)
+        # WAL lets readers carry on while another session writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._add_title_keys()
+            self._connection.executescript(_INDEXES)
+
+    def _add_title_keys(self):
+        """Fills in title_key for databases created before it existed."""
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(movies)")
+        ]
+        if "title_key" not in columns:
+            self._connection.execute("ALTER TABLE movies ADD COLUMN title_key TEXT")
+        rows = self._connection.execute(
+            "SELECT id, title FROM movies WHERE title_key IS NULL"
+        ).fetchall()
+        if not rows:
+            return
+        self._connection.execute("DROP INDEX IF EXISTS idx_movies_title")
+        self._connection.executemany(
+            "UPDATE movies SET title_key = ? WHERE id = ?",
+            ((title.casefold(), movie_id) for movie_id, title in rows),
+        )
+
+    def close(self):
+        """Closes the database connection."""
+        self._connection.close()
+
+    def list_movies(self):
+        """Returns the list of movies."""
+        rows = self._connection.execute(
+            "SELECT title, year, rating, poster FROM movies ORDER BY id"
+        )
+        return {
+            title: {"year": year, "rating": rating, "poster": poster}
+            for title, year, rating, poster in rows
+        }
+
+    def iter_movies(self):
+        """Returns the (title, details) pairs of the movies, read as needed."""
+        rows = self._connection.execute(
+            "SELECT title, year, rating, poster FROM movies ORDER BY id"
+        )
+        for title, year, rating, poster in rows:
+            yield title, {"year": year, "rating": rating, "poster": poster}
+
+    def count(self):
+        """Returns the number of movies."""
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM movies").fetchone()
+        return count
+
+    def catalog_version(self):
+        """Returns a value that changes with every commit to the database."""
+        # data_version only changes for commits made by other connections
+        (data_version,) = self._connection.execute("PRAGMA data_version").fetchone()
+        return data_version, self._connection.total_changes
+
+    def find_movie(self, title):
+        """Returns the stored title and details of a movie, ignoring case."""
+        row = self._connection.execute(
+            "SELECT title, year, rating, poster FROM movies WHERE title_key = ?",
+            (title.casefold(),),
+        ).fetchone()
+        if row is None:
+            return None
+        title_in_db, year, rating, poster = row
+        return title_in_db, {"year": year, "rating": rating, "poster": poster}
+
+    def stats(self, percentiles=(25, 75, 90)):
+        """Returns the rating statistics, read off the rating index."""
+        count, total, unrated = self._connection.execute(
+            "SELECT COUNT(rating), SUM(rating), COUNT(*) - COUNT(rating) FROM movies"
+        ).fetchone()
+        by_year = self._connection.execute(
+            "SELECT year, COUNT(rating), AVG(rating) FROM movies "
+            "WHERE year IS NOT NULL AND rating IS NOT NULL GROUP BY year ORDER BY year"
+        )
+        return {
+            "count": count,
+            "unrated": unrated,
+            "average": total / count if count else None,
+            "median": self._percentile(count, 50),
+            "percentiles": {
+                percent: self._percentile(count, percent) for percent in percentiles
+            },
+            "best": self._extreme("MAX"),
+            "worst": self._extreme("MIN"),
+            "by_year": {
+                year: {"count": year_count, "average": average}
+                for year, year_count, average in by_year
+            },
+        }
+
+    def _percentile(self, count, percent):
+        """Returns a percentile of the ratings, interpolating between ranks."""
+        if not count:
+            return None
+        position = (count - 1) * percent / 100
+        lower = int(position)
+        ratings = [
+            rating
+            for (rating,) in self._connection.execute(
+                "SELECT rating FROM movies WHERE rating IS NOT NULL "
+                "ORDER BY rating LIMIT 2 OFFSET ?",
+                (lower,),
+            )
+        ]
+        fraction = position - lower
+        return ratings[0] * (1 - fraction) + ratings[-1] * fraction
+
+    def _extreme(self, function):
+        """Returns the MAX or MIN rating and the titles sharing it."""
+        (rating,) = self._connection.execute(
+            f"SELECT {function}(rating) FROM movies"
+        ).fetchone()
+        titles = [
+            title
+            for (title,) in self._connection.execute(
+                "SELECT title FROM movies WHERE rating = ? ORDER BY title", (rating,)
+            )
+        ]
+        return {"rating": rating, "titles": titles}
+
+    def movies_by_rating(self, offset=0, limit=None):
+        """Returns a page of (title, details) pairs, walking the rating index."""
+        rows = self._connection.execute(
+            "SELECT title, year, rating, poster FROM movies WHERE rating IS NOT NULL "
+            "ORDER BY rating DESC, title DESC LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        )
+        return StorageSqlite._pairs(rows)
+
+    def top_k(self, n):
+        """Returns the n best rated (title, details) pairs, best first."""
+        return self.movies_by_rating(0, n)
+
+    def rating_range(self, low, high):
+        """Returns the movies rated low to high, best first."""
+        rows = self._connection.execute(
+            "SELECT title, year, rating, poster FROM movies "
+            "WHERE rating BETWEEN ? AND ? ORDER BY rating DESC, title DESC",
+            (low, high),
+        )
+        return StorageSqlite._pairs(rows)
+
+    def year_range(self, low, high):
+        """Returns the movies released from low to high, oldest first."""
+        rows = self._connection.execute(
+            "SELECT title, year, rating, poster FROM movies "
+            "WHERE year BETWEEN ? AND ? ORDER BY year, title",
+            (low, high),
+        )
+        return StorageSqlite._pairs(rows)
+
+    @staticmethod
+    def _pairs(rows):
+        """Turns (title, year, rating, poster) rows into (title, details) pairs."""
+        return [
+            (title, {"year": year, "rating": rating, "poster": poster})
+            for title, year, rating, poster in rows
+        ]
+
+    def add_movie(self, title, year, rating, poster=None):
+        """Adds a new movie to the database."""
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO movies (title, title_key, year, rating, poster) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                (
+                    title,
+                    title.casefold(),
+                    parse_year(year),
+                    parse_rating(rating),
+                    poster,
+                ),
+            )
+        if cursor.rowcount == 0:
+            print(f"Movie '{title}' already exists in the database.")
+        else:
+            print(f"Movie '{title}' added successfully.")
+
+    def add_movies(self, movies):
+        """Adds many movies in one transaction, skipping existing titles."""
+        changes_before = self._connection.total_changes
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO movies (title, title_key, year, rating, poster) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                (
+                    (
+                        title,
+                        title.casefold(),
+                        parse_year(year),
+                        parse_rating(rating),
+                        poster,
+                    )
+                    for title, year, rating, poster in movies
+                ),
+            )
+        added = self._connection.total_changes - changes_before
+        print(f"{added} movies added successfully.")
+        return added
+
+    def delete_movie(self, title):
+        """Deletes a movie by title from the database."""
+        with self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM movies WHERE title_key = ?", (title.casefold(),)
+            )
+        if cursor.rowcount:
+            print(f"Movie '{title}' deleted successfully.")
+        else:
+            print(f"Movie '{title}' not found in the database.")
+
+    def update_movie(self, title, rating):
+        """Updates the rating of an existing movie."""
+        with self._connection:
+            rows = self._connection.execute(
+                "UPDATE movies SET rating = ? WHERE title_key = ? RETURNING title",
+                (parse_rating(rating), title.casefold()),
+            ).fetchall()
+        if rows:
+            print(f"Movie '{rows[0][0]}' rating updated to {rating}.")
+        else:
+            print(f"Movie '{title}' not found in the database.")
+
+    def update_movies(self, ratings):
+        """Updates the ratings of many movies in one transaction."""
+        changes_before = self._connection.total_changes
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE movies SET rating = ? WHERE title_key = ?",
+                (
+                    (parse_rating(rating), title.casefold())
+                    for title, rating in ratings.items()
+                ),
+            )
+        updated = self._connection.total_changes - changes_before
+        print(f"{updated} movie ratings updated.")
+        return updated
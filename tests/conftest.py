@@ -0,0 +1,129 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.omdb_client import OmdbClient
+from benchmarks.stub_omdb import StubOmdbServer
+
+
+class _PosterHandler(BaseHTTPRequestHandler):
+    """Serves the posters of a StubPosterServer, answering revalidations."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server.stub
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            poster = server.posters.get(self.path)
+        if poster is None or server.failing:
+            self.send_response(404 if poster is None else 500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = '"' + hashlib.sha256(poster).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            if server.validators_on_304:
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", server.last_modified)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(poster)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.end_headers()
+        self.wfile.write(poster)
+
+    def log_message(self, format, *args):
+        pass  # Keep the test output clean
+
+
+class StubPosterServer:
+    """
+    A local image host, served from a background thread.
+
+    posters maps paths to the bytes served for them, other paths are
+    answered with 404, and every poster with 500 while failing is set. A
+    request whose If-None-Match matches the ETag of the poster is answered
+    with 304, with the validators only if validators_on_304 is set. The
+    requests received are kept as (path, headers) pairs.
+    """
+
+    def __init__(self):
+        self.posters = {}
+        self.failing = False
+        self.validators_on_304 = True
+        self.last_modified = "Sat, 01 Jan 2000 00:00:00 GMT"
+        self.requests = []
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _PosterHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        # A short poll interval keeps the shutdown at the end of a test quick
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def url(self, path):
+        """The URL of a path on the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def downloads(self, path):
+        """The number of requests for a path that were not revalidations."""
+        with self.lock:
+            return sum(
+                1
+                for requested, headers in self.requests
+                if requested == path and "If-None-Match" not in headers
+            )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A scratch working directory with an empty "data" directory."""
+    (tmp_path / "data").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def omdb_server():
+    """A StubOmdbServer shared by all tests, it keeps no state."""
+    with StubOmdbServer() as server:
+        yield server
+
+
+@pytest.fixture
+def omdb_client(omdb_server):
+    """An OmdbClient talking to the stub server, without cache or backoff."""
+    client = OmdbClient(
+        api_key="apikey=test",
+        base_url=omdb_server.url,
+        max_retries=1,
+        backoff=0,
+        cache=None,
+    )
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def poster_server():
+    """A running StubPosterServer."""
+    with StubPosterServer() as server:
+        yield server
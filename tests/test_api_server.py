@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.api_server import ApiServer
+from backend.movie_service import MovieService
+from storage.factory import open_storage
+
+
+@pytest.fixture
+def api(workdir, omdb_client):
+    """An ApiServer over an empty JSON catalog, fetching from the stub."""
+    return ApiServer(MovieService(open_storage("movies.json"), omdb_client))
+
+
+def exchange(api, request):
+    """
+    Send one raw request to the server and read the response.
+
+    Returns:
+        tuple: The status code and the parsed JSON body, or None if empty.
+    """
+
+    async def run():
+        server = await asyncio.start_server(api._handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            await writer.wait_closed()
+        return response
+
+    response = asyncio.run(run())
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, json.loads(body) if body else None
+
+
+def request(method, path, body=None, headers=()):
+    """Builds a raw HTTP/1.1 request that closes the connection."""
+    body = b"" if body is None else json.dumps(body).encode()
+    lines = [f"{method} {path} HTTP/1.1", "Connection: close", *headers]
+    if body:
+        lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+def test_post_a_title_of_a_series_fetches_it_from_omdb(api, omdb_client):
+    first_year, _ = omdb_client.fetch("Series of events")["Year"].split("–")
+
+    status, movie = exchange(
+        api, request("POST", "/movies", {"title": "Series of events"})
+    )
+
+    assert status == 201
+    assert movie["title"] == "Series of events"
+    assert movie["year"] == int(first_year)
+
+
+def test_post_a_title_omdb_has_no_rating_for(api):
+    status, movie = exchange(api, request("POST", "/movies", {"title": "Unrated"}))
+
+    assert status == 201
+    assert movie["rating"] is None
+
+
+def test_post_rejects_invalid_given_details(api):
+    status, error = exchange(
+        api, request("POST", "/movies", {"title": "Alien", "year": "abc"})
+    )
+
+    assert status == 400
+    assert "year" in error["error"]
+
+
+@pytest.mark.parametrize("rating", [True, 11, -1, "8"])
+def test_put_rejects_invalid_ratings(api, rating):
+    exchange(api, request("POST", "/movies", {"title": "Alien", "rating": 8}))
+
+    status, _ = exchange(api, request("PUT", "/movies/Alien", {"rating": rating}))
+
+    assert status == 400
+
+
+def test_put_rejects_nan(api):
+    exchange(api, request("POST", "/movies", {"title": "Alien", "rating": 8}))
+    body = b'{"rating": NaN}'
+    raw = (
+        b"PUT /movies/Alien HTTP/1.1\r\nConnection: close\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+
+    status, _ = exchange(api, raw)
+
+    assert status == 400
+    assert exchange(api, request("GET", "/movies/alien"))[1]["rating"] == 8
+
+
+def test_search_without_a_query_is_a_bad_request(api):
+    assert exchange(api, request("GET", "/search"))[0] == 400
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1.5"])
+def test_an_invalid_content_length_is_a_bad_request(api, length):
+    status, error = exchange(
+        api, request("POST", "/movies", headers=[f"Content-Length: {length}"])
+    )
+
+    assert status == 400
+    assert error == {"error": "Invalid Content-Length."}
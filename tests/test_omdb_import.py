@@ -0,0 +1,140 @@
+import json
+
+import pytest
+
+from backend.movie_service import MovieService
+from storage.factory import open_storage
+
+
+@pytest.fixture
+def service(workdir, omdb_client):
+    """A MovieService over an empty JSON catalog, fetching from the stub."""
+    return MovieService(
+        open_storage("movies.json"),
+        omdb_client=omdb_client,
+        refresh_checkpoint=str(workdir / "data" / ".refresh"),
+    )
+
+
+def test_fetch_many_keeps_the_input_order(omdb_client):
+    titles = [f"Movie {index}" for index in range(20)] + ["Unknown movie"]
+
+    results = omdb_client.fetch_many(titles)
+
+    assert [title for title, _, _ in results] == titles
+    assert all(error is None for _, _, error in results)
+    assert [details["Title"] for _, details, _ in results[:-1]] == titles[:-1]
+    assert results[-1][1] is None
+
+
+def test_fetch_gives_up_after_retrying_server_errors(omdb_client):
+    results = omdb_client.fetch_many(["Failing movie"])
+
+    ((title, details, error),) = results
+    assert details is None
+    assert "500" in str(error)
+
+
+def test_import_titles_adds_the_movies_omdb_knows(service, omdb_client):
+    result = service.import_titles(["Alien\n", "  \n", "Unknown movie\n", "Heat"])
+
+    assert result == {"added": 2, "not_found": ["Unknown movie"], "errors": {}}
+    assert service.count() == 2
+    expected = omdb_client.fetch("Alien")
+    movie = service.get_movie("alien")
+    assert movie["title"] == "Alien"
+    assert str(movie["year"]) == expected["Year"]
+    assert float(movie["rating"]) == float(expected["imdbRating"])
+    assert movie["poster"] == expected["Poster"]
+
+
+def test_import_titles_reports_failures_and_keeps_going(service):
+    titles = [f"Movie {index}" for index in range(5)] + ["Failing movie"]
+
+    result = service.import_titles(titles, batch_size=2)
+
+    assert result["added"] == 5
+    assert list(result["errors"]) == ["Failing movie"]
+    assert result["not_found"] == []
+
+
+def test_import_titles_skips_movies_already_in_the_catalog(service):
+    service.import_titles(["Alien"])
+
+    assert service.import_titles(["Alien", "Heat"])["added"] == 1
+
+
+def test_refresh_ratings_stores_the_changed_ratings(service, omdb_client, workdir):
+    service.add_movie("Alien", 1979, 0.0)
+    service.add_movie("Heat", 1995, 0.0)
+    service.add_movie("Unknown movie", 2000, 5.0)
+
+    assert service.refresh_ratings() == 2
+
+    for title in ("Alien", "Heat"):
+        expected = float(omdb_client.fetch(title)["imdbRating"])
+        assert float(service.get_movie(title)["rating"]) == expected
+    assert service.get_movie("Unknown movie")["rating"] == 5.0
+    assert not (workdir / "data" / ".refresh").exists()
+    # Nothing changed since, so a second refresh stores nothing
+    assert service.refresh_ratings() == 0
+
+
+def test_refresh_ratings_keeps_failed_titles_for_the_next_run(service, workdir):
+    service.add_movie("Alien", 1979, 0.0)
+    service.add_movie("Failing movie", 2000, 5.0)
+
+    assert service.refresh_ratings() == 1
+
+    checkpoint = workdir / "data" / ".refresh"
+    entries = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert entries == [{"done": ["Alien"], "changes": {}}]
+    # The rerun only retries the failure, which still fails
+    assert service.refresh_ratings() == 0
+    assert checkpoint.exists()
+
+
+def test_series_are_added_with_their_first_year(service, omdb_client):
+    first_year, _ = omdb_client.fetch("Series of events")["Year"].split("–")
+
+    movie = service.add_movie(*service.fetch_details("Series of events"))
+
+    assert movie["year"] == int(first_year)
+
+
+def test_unrated_movies_are_added_without_a_rating(service, omdb_client):
+    assert omdb_client.fetch("Unrated movie")["imdbRating"] == "N/A"
+
+    movie = service.add_movie(*service.fetch_details("Unrated movie"))
+
+    assert movie["rating"] is None
+
+
+@pytest.mark.parametrize(
+    "year, rating",
+    [(2000, float("nan")), (2000, 42), (2000, True), (2000, "zz"), ("abc", 5)],
+)
+def test_add_movie_rejects_invalid_years_and_ratings(service, year, rating):
+    with pytest.raises(ValueError):
+        service.add_movie("Alien", year, rating)
+    assert service.count() == 0
+
+
+def test_an_interrupted_checkpoint_rewrite_keeps_the_progress(
+    service, workdir, monkeypatch
+):
+    service.add_movie("Alien", 1979, 0.0)
+    service.add_movie("Heat", 1995, 0.0)
+    checkpoint = workdir / "data" / ".refresh"
+    progress = json.dumps({"done": ["Alien"], "changes": {"Alien": "8.4"}}) + "\n"
+    checkpoint.write_text(progress)
+
+    def interrupted(*args):
+        raise KeyboardInterrupt
+
+    # Resuming compacts the checkpoint first; stop it right before the swap
+    monkeypatch.setattr("backend.rating_refresh.os.replace", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        service.refresh_ratings()
+
+    assert checkpoint.read_text() == progress
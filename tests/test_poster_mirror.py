@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from backend.poster_mirror import PosterMirror
+
+
+@pytest.fixture
+def mirror(workdir):
+    """A PosterMirror that revalidates every poster on every run."""
+    poster_mirror = PosterMirror(
+        asset_dir=str(workdir / "posters"), timeout=5, revalidate_after=0
+    )
+    yield poster_mirror
+    poster_mirror.session.close()
+
+
+def read_manifest(mirror):
+    with open(mirror.manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+
+def test_mirror_downloads_posters_once_by_content(mirror, poster_server):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    poster_server.posters["/copy-of-a.jpg"] = b"poster a"
+    poster_server.posters["/b.jpg"] = b"poster b"
+    urls = [poster_server.url(path) for path in poster_server.posters]
+
+    paths = mirror.mirror(urls + ["N/A", None])
+
+    assert set(paths) == set(urls)
+    assert paths[urls[0]] == paths[urls[1]] != paths[urls[2]]
+    for url, path in paths.items():
+        with open(path, "rb") as poster_file:
+            assert poster_file.read() == (b"poster b" if "/b" in url else b"poster a")
+    manifest = read_manifest(mirror)
+    assert manifest[urls[0]]["etag"]
+    assert manifest[urls[0]]["last_modified"] == poster_server.last_modified
+
+
+def test_unchanged_posters_are_revalidated_not_downloaded(mirror, poster_server):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    url = poster_server.url("/a.jpg")
+    first = mirror.mirror([url])
+
+    assert mirror.mirror([url]) == first
+
+    assert poster_server.downloads("/a.jpg") == 1
+    path, headers = poster_server.requests[-1]
+    assert headers["If-None-Match"] == read_manifest(mirror)[url]["etag"]
+    assert headers["If-Modified-Since"] == poster_server.last_modified
+
+
+def test_a_304_without_validators_keeps_the_stored_ones(mirror, poster_server):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    url = poster_server.url("/a.jpg")
+    mirror.mirror([url])
+    stored = read_manifest(mirror)[url]
+    poster_server.validators_on_304 = False
+
+    mirror.mirror([url])
+    mirror.mirror([url])
+
+    entry = read_manifest(mirror)[url]
+    assert (entry["etag"], entry["last_modified"]) == (
+        stored["etag"],
+        stored["last_modified"],
+    )
+    assert poster_server.downloads("/a.jpg") == 1
+
+
+def test_changed_posters_are_downloaded_again(mirror, poster_server):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    url = poster_server.url("/a.jpg")
+    old_path = mirror.mirror([url])[url]
+
+    poster_server.posters["/a.jpg"] = b"new poster a"
+    new_path = mirror.mirror([url])[url]
+
+    assert new_path != old_path
+    with open(new_path, "rb") as poster_file:
+        assert poster_file.read() == b"new poster a"
+
+
+def test_posters_that_cannot_be_downloaded_are_left_out(mirror, poster_server, capsys):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    found, missing = poster_server.url("/a.jpg"), poster_server.url("/missing.jpg")
+
+    paths = mirror.mirror([found, missing])
+
+    assert list(paths) == [found]
+    assert missing not in read_manifest(mirror)
+    assert "1 posters could not be mirrored" in capsys.readouterr().out
+
+
+def test_the_old_copy_is_kept_when_revalidation_fails(mirror, poster_server):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    url = poster_server.url("/a.jpg")
+    first = mirror.mirror([url])
+    poster_server.failing = True
+
+    assert mirror.mirror([url]) == first
+
+
+def test_the_manifest_is_reused_by_a_new_mirror(mirror, poster_server, workdir):
+    poster_server.posters["/a.jpg"] = b"poster a"
+    url = poster_server.url("/a.jpg")
+    first = mirror.mirror([url])
+
+    again = PosterMirror(asset_dir=mirror.asset_dir, revalidate_after=3600)
+    try:
+        assert again.mirror([url]) == first
+    finally:
+        again.session.close()
+    assert len(poster_server.requests) == 1
@@ -0,0 +1,46 @@
+import sys
+
+import pytest
+
+from backend.search_index import SearchIndex
+
+TITLES = ["Alien", "Aliens", "Heat", "Her", "Up", "It", "The Thing", "The Shining"]
+
+
+@pytest.fixture
+def without_numpy(monkeypatch):
+    """Makes importing numpy fail, as on an install without it."""
+    monkeypatch.setitem(sys.modules, "numpy", None)
+
+
+def test_queries_with_trigrams_are_prefiltered():
+    index = SearchIndex(TITLES)
+
+    (best, score), *_ = index.search("Alien")
+
+    assert (best, score) == ("Alien", 100)
+    assert [title for title, _ in index.search("the thng", limit=2)] == [
+        "The Thing",
+        "The Shining",
+    ]
+
+
+def test_short_queries_are_scored_against_every_title(without_numpy):
+    index = SearchIndex(TITLES)
+    assert index._candidates("u") is None and index._candidates("h") is None
+
+    results = index.search_many(["u", "h"], limit=2)
+
+    assert results[0][0][0] == "Up"
+    assert {title for title, _ in results[1]} <= {"Heat", "Her"}
+
+
+def test_numpy_scores_short_queries_like_the_fallback(monkeypatch):
+    pytest.importorskip("numpy")
+    index = SearchIndex(TITLES)
+    queries = ["u", "h", "i", "x"]
+
+    with_numpy = index.search_many(queries, limit=3)
+    monkeypatch.setitem(sys.modules, "numpy", None)
+
+    assert index.search_many(queries, limit=3) == with_numpy
@@ -0,0 +1,60 @@
+import contextlib
+import io
+
+import pytest
+
+from storage.factory import open_storage
+
+# Ties in rating and year, and titles that sort differently by case and id
+MOVIES = [
+    ("beta", 2001, 8.0, None),
+    ("Alpha", 2001, 8.0, None),
+    ("Gamma", 1999, 9.5, None),
+    ("delta", 2001, 8.0, None),
+    ("Émile", 1999, 7.0, None),
+    ("Epsilon", 1999, 7.0, None),
+    ("Unrated", 2001, None, None),
+]
+
+BACKENDS = [
+    ("movies.json", {}),
+    ("movies.json", {"columnar": True}),
+    ("movies.csv", {}),
+    ("movies.csv", {"streaming": True}),
+    ("movies.db", {}),
+    ("movies.mdb", {}),
+]
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda backend: backend[0] + str(backend[1]))
+def storage(request, workdir):
+    file_name, options = request.param
+    storage = open_storage(file_name, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage.add_movies(MOVIES)
+    return storage
+
+
+def titles(pairs):
+    return [title for title, _ in pairs]
+
+
+def test_ties_in_rating_are_ordered_by_title(storage):
+    by_rating = ["Gamma", "delta", "beta", "Alpha", "Émile", "Epsilon"]
+
+    assert titles(storage.movies_by_rating()) == by_rating
+    assert titles(storage.movies_by_rating(1, 2)) == by_rating[1:3]
+    assert titles(storage.top_k(3)) == by_rating[:3]
+    assert titles(storage.rating_range(7, 8)) == by_rating[1:]
+
+
+def test_ties_in_year_are_ordered_by_title(storage):
+    assert titles(storage.year_range(1999, 2001)) == [
+        "Epsilon",
+        "Gamma",
+        "Émile",
+        "Alpha",
+        "Unrated",
+        "beta",
+        "delta",
+    ]